@@ -2,10 +2,14 @@ from ._agg import AggregateEncoder  # noqa: F401
 from ._binarize import MultiLabelBinarizer  # noqa: F401
 from ._binarize import OneHotEncoder  # noqa: F401
 from ._count import CountEncoder  # noqa: F401
+from ._io import load_encoder  # noqa: F401
+from ._io import save_encoder  # noqa: F401
 from ._null import NullEncoder  # noqa: F401
 from ._oof import OutOfFoldEncodeWrapper  # noqa: F401
 from ._ordinal import OrdinalEncoder  # noqa: F401
+from ._sink import sink_transform  # noqa: F401
 from ._target import TargetEncoder  # noqa: F401
+from ._union import EncoderUnion  # noqa: F401
 
 __version__ = "0.0.4"
 __all__ = [
@@ -17,4 +21,8 @@ __all__ = [
     "OrdinalEncoder",
     "TargetEncoder",
     "OutOfFoldEncodeWrapper",
+    "EncoderUnion",
+    "sink_transform",
+    "save_encoder",
+    "load_encoder",
 ]
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from typing import Literal
 
 import polars as pl
 
 from ._base import BaseEncoder
+from ._base import _lookup_expr
 
 
 class AggregateEncoder(BaseEncoder):
@@ -39,49 +39,30 @@ class AggregateEncoder(BaseEncoder):
 
         self.mappings: dict[str, pl.DataFrame] = {}
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        for col in self.cols:
-            self.mappings[col] = X.group_by(
-                by=col,
-            ).agg(
-                [expr.alias(f"{col}_{name}") for name, expr in self.agg_exprs.items()]
-            )
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        plans = [
+            X.group_by(col)
+            .agg([expr.alias(f"{col}_{name}") for name, expr in self.agg_exprs.items()])
+            .filter(pl.col(col).is_not_null())
+            for col in self.cols
+        ]
+        self.mappings.update(zip(self.cols, pl.collect_all(plans)))
 
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+    def _known_values(self) -> dict[str, pl.Series]:
+        return {col: mapping.get_column(col) for col, mapping in self.mappings.items()}
+
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
         unknown_value = -1
         missing_value = -2
 
-        X_lazy: pl.LazyFrame = X.select(self.mappings.keys()).lazy()
-
-        for col, mapping in self.mappings.items():
-            col_remappings: dict[str, dict[str | None, float | int]] = defaultdict(dict)
-
-            for category, *agg_values in mapping.rows():
-                for agg_name, agg_value in zip(mapping.columns[1:], agg_values):
-                    col_remappings[agg_name][category] = agg_value
-
-            for agg_name, replace_map in col_remappings.items():
-                value_sample = next(iter(replace_map.values()))
-                cast_type = type(value_sample)
-                col_remappings[agg_name][None] = cast_type(missing_value)
-
-            X_lazy = X_lazy.with_columns(
-                [
-                    pl.col(col)
-                    .replace_strict(remapping, default=unknown_value)
-                    .alias(agg_name)
-                    for agg_name, remapping in col_remappings.items()
-                ]
-            )
-
-        transformed = X_lazy.drop(list(self.mappings.keys())).collect()
-
-        if self.handle_unknown == "error":
-            contains_unknown = transformed.select(pl.col("*") == unknown_value).sum()
-            for col in contains_unknown.columns:
-                if contains_unknown.get_column(col)[0] > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
-
-        return transformed
+        return [
+            _lookup_expr(
+                col,
+                mapping.get_column(col),
+                mapping.get_column(agg_name),
+                unknown_value,
+                missing_value,
+            ).alias(agg_name)
+            for col, mapping in self.mappings.items()
+            for agg_name in mapping.columns[1:]
+        ]
@@ -1,14 +1,34 @@
 from __future__ import annotations
 
 from abc import abstractmethod
+from typing import Any
+from typing import Callable
 from typing import Literal
+from typing import NamedTuple
+from typing import overload
 
 import polars as pl
-from sklearn.base import BaseEstimator
-from sklearn.base import TransformerMixin
 
+from ._estimator import BaseEstimator
+from ._estimator import TransformerMixin
 from ._exceptions import NotFittedException
 
+_MISSING_MESSAGE = "Columns to be encoded can not contain null"
+_UNKNOWN_MESSAGE = "Columns to be encoded can not contain unknown value"
+_GROUP_COL = "__shirokumas_group"
+_WEIGHT_COL = "__shirokumas_weight"
+_INTERMEDIATE_COL = "__shirokumas_intermediate"
+
+
+class _LookupTable(NamedTuple):
+    """Fitted encoding of a column as a frame of keys and encoded values."""
+
+    # the key column followed by a column of values per output
+    frame: pl.DataFrame
+    outputs: list[str]
+    unknown_values: list[Any]
+    missing_values: list[Any]
+
 
 class BaseEncoder(BaseEstimator, TransformerMixin):
     def __init__(
@@ -23,50 +43,271 @@ class BaseEncoder(BaseEstimator, TransformerMixin):
 
         self._fitted: bool = False
 
-    def fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
+    @property
+    def is_fitted(self) -> bool:
+        """Whether the encoder has been fitted."""
+        return self._fitted
+
+    def fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
         """Train the features.
 
         :param X:
             explanatory feature.
+            a LazyFrame is also accepted, only the aggregations needed for training are collected.
         :param y:
             objective feature.
         """
-        self.cols = self.cols or X.columns
+        X_lazy = X.lazy()
+        self.cols = self.cols or X_lazy.collect_schema().names()
 
         if self.handle_missing == "error":
-            contains_missing = X.select(self.cols).null_count() > 0
-            for col in contains_missing.columns:
-                if contains_missing.get_column(col)[0]:
-                    raise ValueError("Columns to be encoded can not contain null")
+            X_lazy = self._check_missing(X_lazy)
 
-        self._fit(X, y, **fit_params)
+        self._fit(X_lazy, y, **fit_params)
 
         self._fitted = True
 
         return self
 
     @abstractmethod
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
         raise NotImplementedError()
 
-    def transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+    def _lookup_tables(self) -> dict[str, _LookupTable] | None:
+        """Return the fitted encoding as a lookup table for each column.
+
+        None if the encoding is not a lookup of the values of each column.
+        """
+        return None
+
+    @overload
+    def transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame: ...
+
+    @overload
+    def transform(self, X: pl.LazyFrame, **transform_params) -> pl.LazyFrame: ...
+
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
         """Transform the features.
 
         :param X:
             explanatory feature.
+            if a LazyFrame is given, a LazyFrame is returned without being collected.
         """
         if not self._fitted:
             raise NotFittedException("This encoder instance is not fitted yet")
 
+        transformed = self._transform(X.lazy(), **transform_params)
+
+        if isinstance(X, pl.LazyFrame):
+            return transformed
+        return transformed.collect()
+
+    def _transform(self, X: pl.LazyFrame, **transform_params) -> pl.LazyFrame:
+        X = self._prepare(self._check_input(X))
+        return X.select(self._transform_exprs(**transform_params))
+
+    def _prepare(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        """Add the intermediate columns that _transform_exprs() refers to.
+
+        An intermediate column is computed once however many outputs read it,
+        while a subexpression repeated in every output would be evaluated each time.
+        """
+        return X
+
+    @abstractmethod
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        """Build the expressions that compute the encoded columns from the input."""
+        raise NotImplementedError()
+
+    def _intermediate_col(self, col: str) -> str:
+        """Name of an intermediate column, unique among the encoders of a query."""
+        return f"{_INTERMEDIATE_COL}_{id(self):x}_{col}"
+
+    def _known_values(self) -> dict[str, pl.Series]:
+        """Values seen in training for each column, used to detect unknown values."""
+        return {}
+
+    def _check_input(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        """Attach the validations selected by handle_missing and handle_unknown."""
+        if self.handle_missing == "error":
+            X = self._check_missing(X)
+        if self.handle_unknown == "error":
+            X = self._check_unknown(X, self._known_values())
+        return X
+
+    def _check_missing(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        """Make the query fail when the columns to be encoded contain null."""
+        exprs = [
+            _validated(pl.col(col), self._missing_expr(col), _MISSING_MESSAGE)
+            for col in self.cols
+        ]
+        return X.with_columns(expr.alias(col) for expr, col in zip(exprs, self.cols))
+
+    def _check_unknown(
+        self,
+        X: pl.LazyFrame,
+        known_values: dict[str, pl.Series],
+    ) -> pl.LazyFrame:
+        """Make the query fail when the columns contain values not seen in training."""
+        exprs = [
+            _validated(pl.col(col), self._unknown_expr(col, known), _UNKNOWN_MESSAGE)
+            for col, known in known_values.items()
+        ]
+        return X.with_columns(
+            expr.alias(col) for expr, col in zip(exprs, known_values.keys())
+        )
+
+    def _missing_expr(self, col: str) -> pl.Expr:
+        return pl.col(col).is_null()
+
+    def _unknown_expr(self, col: str, known: pl.Series) -> pl.Expr:
+        # null is not unknown, is_in() leaves it null and any() skips it
+        return pl.col(col).is_in(known.implode()).not_()
+
+
+class AdditiveEncoder(BaseEncoder):
+    """Encoder whose fitted state is derived from additive statistics.
+
+    The statistics of disjoint groups of rows can be summed, or subtracted,
+    which lets OutOfFoldEncodeWrapper fit every fold from a single aggregation.
+    """
+
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        self._fit_from_stats(self._sufficient_stats(X, y, [], **fit_params))
+
+    def fit_stats(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None,
+        groups: pl.Series,
+        **fit_params,
+    ) -> dict[str, pl.DataFrame]:
+        """Compute the additive statistics for each group of rows.
+
+        The statistics of several groups can be summed, or subtracted, and then
+        passed to fit_with_stats() to fit the encoder on a union of the groups.
+        """
+        X_lazy = X.lazy()
+        self.cols = self.cols or X_lazy.collect_schema().names()
+
         if self.handle_missing == "error":
-            contains_missing = X.select(self.cols).null_count() > 0
-            for col in contains_missing.columns:
-                if contains_missing.get_column(col)[0]:
-                    raise ValueError("Columns to be encoded can not contain null")
+            X_lazy = self._check_missing(X_lazy)
+
+        X_lazy = X_lazy.with_columns(groups.alias(_GROUP_COL))
+        return self._sufficient_stats(X_lazy, y, [_GROUP_COL], **fit_params)
+
+    def fit_with_stats(self, stats: dict[str, pl.DataFrame]):
+        """Fit the encoder from statistics summed over the groups of interest."""
+        self.cols = self.cols or list(stats.keys())
+
+        self._fit_from_stats(stats)
+
+        self._fitted = True
+
+        return self
+
+    @abstractmethod
+    def _sufficient_stats(
+        self,
+        X: pl.LazyFrame,
+        y: pl.Series | None,
+        by: list[str],
+        **fit_params,
+    ) -> dict[str, pl.DataFrame]:
+        """Aggregate signed additive statistics by `by` and each column.
 
-        X_transformed = self._transform(X, **transform_params)
-        return X_transformed
+        Every frame must contain the key columns and a 'len' column
+        holding the number of rows, the other columns are free.
+        """
+        raise NotImplementedError()
 
     @abstractmethod
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+    def _fit_from_stats(self, stats: dict[str, pl.DataFrame]) -> None:
         raise NotImplementedError()
+
+
+def _raise_if_any(message: str) -> Callable[[pl.Series], pl.Series]:
+    def check(violations: pl.Series) -> pl.Series:
+        if violations.any():
+            raise ValueError(message)
+        return violations
+
+    return check
+
+
+def _validated(expr: pl.Expr, violation: pl.Expr, message: str) -> pl.Expr:
+    """Wrap an expression so that the query raises ValueError if a row violates.
+
+    The check runs batch by batch inside the query plan that evaluates the
+    expression, so validation does not need a separate pass over the data.
+    """
+    violated = violation.map_batches(
+        _raise_if_any(message),
+        return_dtype=pl.Boolean,
+        is_elementwise=True,
+    )
+    return pl.when(violated).then(None).otherwise(expr)
+
+
+def _lookup_expr(
+    col: str,
+    keys: pl.Series,
+    values: pl.Series,
+    unknown_value: int | float,
+    missing_value: int | float,
+    return_dtype: pl.DataType | None = None,
+) -> pl.Expr:
+    """Build an expression that remaps a column with a fitted lookup table.
+
+    :param col:
+        name of the column to remap.
+    :param keys:
+        categories seen in training, must not contain null.
+    :param values:
+        encoded values aligned with keys.
+    """
+    remapped = pl.col(col).replace_strict(
+        keys,
+        values,
+        default=unknown_value,
+        return_dtype=return_dtype,
+    )
+    return pl.when(pl.col(col).is_null()).then(missing_value).otherwise(remapped)
+
+
+def _lookup_table_exprs(
+    tables: dict[str, _LookupTable],
+    return_dtype: pl.DataType | None = None,
+) -> list[pl.Expr]:
+    exprs = []
+    for col, table in tables.items():
+        keys = table.frame.to_series(0)
+        for i, output in enumerate(table.outputs):
+            expr = _lookup_expr(
+                col,
+                keys,
+                table.frame.to_series(i + 1),
+                table.unknown_values[i],
+                table.missing_values[i],
+                return_dtype=return_dtype,
+            )
+            exprs.append(expr.alias(output))
+    return exprs
+
+
+def _with_sample_weight(X: pl.LazyFrame, sample_weight: Any | None) -> pl.LazyFrame:
+    """Add the sample weights as a column, 1.0 for every row if None."""
+    if sample_weight is None:
+        weight = pl.lit(1.0, dtype=pl.Float64)
+    else:
+        weight = pl.lit(pl.Series(sample_weight).cast(pl.Float64))
+    return X.with_columns(weight.alias(_WEIGHT_COL))
@@ -1,13 +1,245 @@
 from __future__ import annotations
 
+from abc import abstractmethod
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
 from typing import Literal
+from typing import overload
 
 import polars as pl
 
 from ._base import BaseEncoder
+from ._exceptions import NotFittedException
 
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
 
-class OneHotEncoder(BaseEncoder):
+# the category of the column shared by the values not kept, as scikit-learn names it
+_OTHER_CATEGORY = "infrequent_shirokumas"
+
+
+class _BaseBinarizer(BaseEncoder):
+    """Encoder with an output column per fitted category of each column."""
+
+    def __init__(
+        self,
+        cols: list[str] | None,
+        handle_unknown: Literal["value", "error"],
+        handle_missing: Literal["value", "error"],
+        sparse_output: bool,
+        max_categories: int | None,
+        min_frequency: int | float | None,
+        packed_output: bool,
+    ):
+        super().__init__(cols, handle_unknown, handle_missing)
+        self.sparse_output = sparse_output
+        self.packed_output = packed_output
+        self.max_categories = max_categories
+        self.min_frequency = min_frequency
+        self.mappings: dict[str, pl.Series] = {}
+        # values seen in training that share the column of _OTHER_CATEGORY
+        self.other_values: dict[str, pl.Series] = {}
+
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        if self.sparse_output and self.packed_output:
+            raise ValueError("sparse_output and packed_output can not be both True")
+
+        self.mappings = {}
+        self.other_values = {}
+
+        if self.max_categories is None and self.min_frequency is None:
+            plans = [
+                X.select(self._values_expr(col).unique(maintain_order=True).alias(col))
+                for col in self.cols
+            ]
+            for col, unique_df in zip(self.cols, pl.collect_all(plans)):
+                self.mappings[col] = unique_df.get_column(col)
+            return
+
+        # count the rows of each value in order of appearance, nulls are no category
+        plans = [X.select(pl.len())] + [
+            X.select(self._values_expr(col).drop_nulls().alias("value"))
+            .group_by("value", maintain_order=True)
+            .agg(pl.len())
+            for col in self.cols
+        ]
+        n_rows_df, *counts_dfs = pl.collect_all(plans)
+        n_rows = n_rows_df.item()
+        for col, counts_df in zip(self.cols, counts_dfs):
+            frequent_df = self._frequent(counts_df.with_row_index(), n_rows)
+            self.mappings[col] = frequent_df.get_column("value").alias(col)
+            other_df = counts_df.join(frequent_df, on="value", how="anti")
+            if other_df.height > 0:
+                self.other_values[col] = other_df.get_column("value").alias(col)
+                if self.mappings[col].cast(pl.String).eq(_OTHER_CATEGORY).any():
+                    raise ValueError(
+                        f"Column {col!r} can not keep the category {_OTHER_CATEGORY!r}"
+                    )
+
+    def _frequent(self, counts_df: pl.DataFrame, n_rows: int) -> pl.DataFrame:
+        """Select the values kept by min_frequency and max_categories, in order."""
+        if isinstance(self.min_frequency, float):
+            counts_df = counts_df.filter(pl.col("len") >= self.min_frequency * n_rows)
+        elif self.min_frequency is not None:
+            counts_df = counts_df.filter(pl.col("len") >= self.min_frequency)
+
+        if self.max_categories is not None:
+            counts_df = (
+                counts_df.sort(["len", "index"], descending=[True, False])
+                .head(self.max_categories)
+                .sort("index")
+            )
+        return counts_df
+
+    @abstractmethod
+    def _values_expr(self, col: str) -> pl.Expr:
+        """Build the expression of the values of a column to be fitted."""
+        raise NotImplementedError()
+
+    def _known_values(self) -> dict[str, pl.Series]:
+        return {
+            col: (
+                pl.concat([unique_values, self.other_values[col]])
+                if col in self.other_values
+                else unique_values
+            )
+            for col, unique_values in self.mappings.items()
+        }
+
+    def _n_outputs(self, col: str) -> int:
+        return len(self.mappings[col]) + (col in self.other_values)
+
+    def _positions(self, expr: pl.Expr, col: str) -> pl.Expr:
+        return _position_expr(expr, self.mappings[col], self.other_values.get(col))
+
+    @abstractmethod
+    def _position_expr(self, col: str) -> pl.Expr:
+        """Build the expression that maps a column to the positions of its categories.
+
+        Positions are UInt32, self._n_outputs(col) is used for no category.
+        """
+        raise NotImplementedError()
+
+    def get_feature_names_out(self, input_features: Any = None) -> list[str]:
+        """Return the names of the encoded columns.
+
+        :param input_features:
+            ignored, accepted for compatibility with scikit-learn.
+        """
+        del input_features
+        names: list[str] = []
+        for col, unique_values in self.mappings.items():
+            names.extend(f"{col}_{unique_value}" for unique_value in unique_values)
+            if col in self.other_values:
+                names.append(f"{col}_{_OTHER_CATEGORY}")
+        return names
+
+    def _with_words(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        """Add the positions of each row packed into words of 64 bits.
+
+        Position i of a column is bit i % 64 of its word i // 64,
+        the words are columns named by _word_col().
+        """
+        packed_exprs = []
+        for col in self.mappings:
+            n_words = _n_words(self._n_outputs(col))
+            packed = self._position_expr(col).map_batches(
+                _pack_positions(self._n_outputs(col), n_words),
+                return_dtype=pl.Array(pl.UInt64, n_words),
+                is_elementwise=True,
+            )
+            word_cols = [self._word_col(col, word) for word in range(n_words)]
+            packed_exprs.append(
+                packed.arr.to_struct(fields=word_cols).alias(
+                    self._intermediate_col(col)
+                )
+            )
+        return X.with_columns(packed_exprs).unnest(
+            [self._intermediate_col(col) for col in self.mappings]
+        )
+
+    def _word_col(self, col: str, word: int) -> str:
+        return f"{self._intermediate_col(col)}_{word}"
+
+    def _packed_exprs(self) -> list[pl.Expr]:
+        return [
+            pl.col(self._word_col(col, word)).alias(_packed_col(col, word))
+            for col in self.mappings
+            for word in range(_n_words(self._n_outputs(col)))
+        ]
+
+    def _unpack_exprs(self, word_col: Callable[[str, int], str]) -> list[pl.Expr]:
+        bits = [
+            pl.col(word_col(col, position // 64))
+            & pl.lit(1 << (position % 64), dtype=pl.UInt64)
+            != 0
+            for col in self.mappings
+            for position in range(self._n_outputs(col))
+        ]
+        return [
+            bit.alias(name) for bit, name in zip(bits, self.get_feature_names_out())
+        ]
+
+    @overload
+    def unpack(self, X: pl.DataFrame) -> pl.DataFrame: ...
+
+    @overload
+    def unpack(self, X: pl.LazyFrame) -> pl.LazyFrame: ...
+
+    def unpack(self, X: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """Expand the words of packed_output into a Boolean column per category.
+
+        :param X:
+            a frame containing the columns '{col}_packed_{i}' returned by transform().
+            the result is the same as transform() without packed_output.
+        """
+        if not self._fitted:
+            raise NotFittedException("This encoder instance is not fitted yet")
+
+        unpacked = X.lazy().select(self._unpack_exprs(_packed_col))
+
+        if isinstance(X, pl.LazyFrame):
+            return unpacked
+        return unpacked.collect()
+
+    @overload
+    def transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame: ...
+
+    @overload
+    def transform(self, X: pl.LazyFrame, **transform_params) -> pl.LazyFrame: ...
+
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame | sparse.csr_matrix:
+        """Transform the features.
+
+        :param X:
+            explanatory feature.
+            if a LazyFrame is given, a LazyFrame is returned without being collected,
+            unless sparse_output is True.
+        """
+        if not self.sparse_output:
+            return super().transform(X, **transform_params)
+
+        if not self._fitted:
+            raise NotFittedException("This encoder instance is not fitted yet")
+
+        positions_df = (
+            self._check_input(X.lazy())
+            .select(self._position_expr(col).alias(col) for col in self.mappings)
+            .collect()
+        )
+        return _csr_matrix(
+            [positions_df.get_column(col) for col in self.mappings],
+            [self._n_outputs(col) for col in self.mappings],
+        )
+
+
+class OneHotEncoder(_BaseBinarizer):
     """Encode categorical features as a one-hot matrix."""
 
     def __init__(
@@ -15,6 +247,10 @@ class OneHotEncoder(BaseEncoder):
         cols: list[str] | None = None,
         handle_unknown: Literal["value", "error"] = "value",
         handle_missing: Literal["value", "error"] = "value",
+        sparse_output: bool = False,
+        max_categories: int | None = None,
+        min_frequency: int | float | None = None,
+        packed_output: bool = False,
     ):
         """
 
@@ -29,48 +265,68 @@ class OneHotEncoder(BaseEncoder):
             choice of handling missing values.
             defaults to 'value', missing values are replaced by all zero columns.
             If 'error' is selected, ValueError is thrown when a missing value is encountered.
+        :param sparse_output:
+            if True, transform() returns a Boolean scipy.sparse.csr_matrix
+            whose columns are named by get_feature_names_out().
+            requires scipy, e.g. ``pip install shirokumas[sparse]``.
+            EncoderUnion always concatenates the dense columns.
+        :param max_categories:
+            the maximum number of categories to keep for each column, the most frequent ones.
+            the other values seen in training share the column
+            '{col}_infrequent_shirokumas'.
+        :param min_frequency:
+            the minimum number of rows for a category to be kept, or the minimum
+            fraction of rows if a float is given.
+            the other values seen in training share the column
+            '{col}_infrequent_shirokumas'.
+        :param packed_output:
+            if True, the outputs of each column are packed into UInt64 columns
+            '{col}_packed_{i}' of 64 bits each, the bit i % 64 of the word i // 64
+            being the i-th column of get_feature_names_out() for the column.
+            unpack() expands them into Boolean columns.
         """
-        super().__init__(cols, handle_unknown, handle_missing)
-        self.mappings: dict[str, pl.Series] = {}
+        super().__init__(
+            cols,
+            handle_unknown,
+            handle_missing,
+            sparse_output,
+            max_categories,
+            min_frequency,
+            packed_output,
+        )
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        cols = self.cols or X.columns
-
-        for col in cols:
-            unique_values = X.get_column(col).unique(maintain_order=True)
-            self.mappings[col] = unique_values
+    def _values_expr(self, col: str) -> pl.Expr:
+        return pl.col(col)
 
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.select(self.mappings.keys()).lazy()
+    def _position_expr(self, col: str) -> pl.Expr:
+        return self._positions(pl.col(col), col)
 
-        for col, unique_values in self.mappings.items():
-            if self.handle_unknown == "error":
-                transform_unique_values = set(X.get_column(col).unique().to_list())
-                mapping_unique_values = set(unique_values.to_list())
-                unknown_value = transform_unique_values - mapping_unique_values
-                if len(unknown_value) > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
+    def _prepare(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        if self.packed_output:
+            return self._with_words(X)
 
-            exprs = []
-            for unique_value in unique_values:
-                expr = (
-                    pl.when(pl.col(col) == unique_value)
-                    .then(1)
-                    .otherwise(0)
-                    .cast(pl.Boolean)
-                    .alias(f"{col}_{unique_value}")
-                )
-                exprs.append(expr)
-            X_lazy = X_lazy.with_columns(exprs)
+        # each row is looked up once, the outputs only compare its position
+        return X.with_columns(
+            self._position_expr(col).alias(self._intermediate_col(col))
+            for col in self.mappings
+        )
 
-        transformed = X_lazy.drop(list(self.mappings.keys())).collect()
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        if self.packed_output:
+            return self._packed_exprs()
 
-        return transformed
+        positions = [
+            pl.col(self._intermediate_col(col)) == position
+            for col in self.mappings
+            for position in range(self._n_outputs(col))
+        ]
+        return [
+            position.alias(name)
+            for position, name in zip(positions, self.get_feature_names_out())
+        ]
 
 
-class MultiLabelBinarizer(BaseEncoder):
+class MultiLabelBinarizer(_BaseBinarizer):
     """Encode list of categorical features as a multi-hot matrix."""
 
     def __init__(
@@ -78,6 +334,10 @@ class MultiLabelBinarizer(BaseEncoder):
         cols: list[str] | None = None,
         handle_unknown: Literal["value", "error"] = "value",
         handle_missing: Literal["value", "error"] = "value",
+        sparse_output: bool = False,
+        max_categories: int | None = None,
+        min_frequency: int | float | None = None,
+        packed_output: bool = False,
     ):
         """
 
@@ -92,60 +352,187 @@ class MultiLabelBinarizer(BaseEncoder):
             choice of handling missing values.
             defaults to 'value', missing values are replaced by all zero columns.
             If 'error' is selected, ValueError is thrown when a missing value is encountered.
+        :param sparse_output:
+            if True, transform() returns a Boolean scipy.sparse.csr_matrix
+            whose columns are named by get_feature_names_out().
+            requires scipy, e.g. ``pip install shirokumas[sparse]``.
+            EncoderUnion always concatenates the dense columns.
+        :param max_categories:
+            the maximum number of categories to keep for each column, the most frequent ones.
+            the other values seen in training share the column
+            '{col}_infrequent_shirokumas'.
+        :param min_frequency:
+            the minimum number of rows for a category to be kept, or the minimum
+            fraction of rows if a float is given.
+            the other values seen in training share the column
+            '{col}_infrequent_shirokumas'.
+        :param packed_output:
+            if True, the outputs of each column are packed into UInt64 columns
+            '{col}_packed_{i}' of 64 bits each, the bit i % 64 of the word i // 64
+            being the i-th column of get_feature_names_out() for the column.
+            unpack() expands them into Boolean columns.
         """
-        super().__init__(cols, handle_unknown, handle_missing)
-        self.mappings: dict[str, pl.Series] = {}
+        super().__init__(
+            cols,
+            handle_unknown,
+            handle_missing,
+            sparse_output,
+            max_categories,
+            min_frequency,
+            packed_output,
+        )
+
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        self._check_list_dtype(X, self.cols)
+        super()._fit(X, y, **fit_params)
+
+    def _values_expr(self, col: str) -> pl.Expr:
+        # a label is counted once per row
+        return pl.col(col).list.unique(maintain_order=True).explode()
+
+    def _position_expr(self, col: str) -> pl.Expr:
+        n_outputs = self._n_outputs(col)
+        return (
+            pl.col(col)
+            .list.eval(self._positions(pl.element(), col))
+            .list.eval(pl.element().filter(pl.element() < n_outputs).unique().sort())
+        )
+
+    def _check_input(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        self._check_list_dtype(X, list(self.mappings.keys()))
+        return super()._check_input(X)
+
+    def _prepare(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        # the labels of a row are packed into words of 64 bits in one pass,
+        # so that each output tests a bit instead of scanning the lists
+        return self._with_words(X)
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        cols = self.cols or X.columns
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        if self.packed_output:
+            return self._packed_exprs()
+        return self._unpack_exprs(self._word_col)
 
+    @staticmethod
+    def _check_list_dtype(X: pl.LazyFrame, cols: list[str]) -> None:
+        schema = X.collect_schema()
         for col in cols:
-            if X.get_column(col).dtype != pl.List:
+            if schema[col] != pl.List:
                 raise ValueError("Columns are expected to contain only List")
 
-            exploded_items = X.get_column(col).explode()
+    def _check_missing(self, X: pl.LazyFrame) -> pl.LazyFrame:
+        self._check_list_dtype(X, self.cols)
+        return super()._check_missing(X)
 
-            if self.handle_missing == "error":
-                contains_missing = exploded_items.is_null().sum() > 0
-                if contains_missing:
-                    raise ValueError("Columns to be encoded can not contain null")
+    def _missing_expr(self, col: str) -> pl.Expr:
+        contains_null = pl.col(col).list.eval(pl.element().is_null()).list.any()
+        return pl.col(col).is_null() | contains_null
 
-            unique_values = exploded_items.unique(maintain_order=True)
-            self.mappings[col] = unique_values
+    def _unknown_expr(self, col: str, known: pl.Series) -> pl.Expr:
+        contains_unknown = pl.col(col).list.eval(
+            pl.element().is_in(known.implode()).not_()
+        )
+        return contains_unknown.list.any()
 
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.select(self.mappings.keys()).lazy()
 
-        for col, unique_values in self.mappings.items():
-            if X.get_column(col).dtype != pl.List:
-                raise ValueError("Columns are expected to contain only List")
+def _position_expr(
+    expr: pl.Expr,
+    unique_values: pl.Series,
+    other_values: pl.Series | None = None,
+) -> pl.Expr:
+    """Map each value to its position in unique_values.
 
-            if self.handle_missing == "error":
-                exploded_items = X.get_column(col).explode()
-                contains_missing = exploded_items.is_null().sum() > 0
-                if contains_missing:
-                    raise ValueError("Columns to be encoded can not contain null")
-
-            if self.handle_unknown == "error":
-                exploded_items = X.get_column(col).explode()
-                transform_unique_values = set(exploded_items.unique().to_list())
-                mapping_unique_values = set(unique_values.to_list())
-                unknown_value = transform_unique_values - mapping_unique_values
-                if len(unknown_value) > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
+    other_values are mapped to len(unique_values), the position of _OTHER_CATEGORY.
+    Unknown and missing values are mapped past the last position, which matches no output.
+    A null among unique_values matches nothing either, missing values are not a category.
+    """
+    keys = unique_values
+    positions = pl.int_range(len(unique_values), dtype=pl.UInt32, eager=True)
+    if other_values is not None:
+        keys = pl.concat([keys, other_values])
+        positions = positions.extend_constant(len(unique_values), len(other_values))
+
+    is_value = keys.is_not_null()
+    return expr.replace_strict(
+        keys.filter(is_value),
+        positions.filter(is_value),
+        default=len(unique_values) + (other_values is not None),
+        return_dtype=pl.UInt32,
+    )
+
+
+def _packed_col(col: str, word: int) -> str:
+    return f"{col}_packed_{word}"
+
+
+def _n_words(n_values: int) -> int:
+    # at least a word, so that the packed array is never empty
+    return max((n_values + 63) // 64, 1)
+
+
+def _pack_positions(
+    n_outputs: int,
+    n_words: int,
+) -> Callable[[pl.Series], pl.Series]:
+    """Pack positions into arrays of n_words UInt64, a bit per position."""
+
+    def pack(positions: pl.Series) -> pl.Series:
+        import numpy as np
+
+        lengths, indices = _flatten_positions(positions, n_outputs)
+        values = indices.astype(np.uint64)
+        rows = np.repeat(np.arange(len(positions)), lengths)
+
+        words = np.zeros((len(positions), n_words), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), values & np.uint64(63))
+        np.bitwise_or.at(words, (rows, values >> np.uint64(6)), bits)
+        return pl.Series(positions.name, words)
+
+    return pack
+
+
+def _csr_matrix(positions: list[pl.Series], n_values: list[int]) -> sparse.csr_matrix:
+    """Build a Boolean CSR matrix from the positions of the categories of each column.
+
+    :param positions:
+        positions of each column, UInt32 or lists of sorted unique UInt32.
+    :param n_values:
+        number of outputs of each column, also the position of no category.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    matrices = []
+    for column_positions, n in zip(positions, n_values):
+        lengths, indices = _flatten_positions(column_positions, n)
+
+        indptr = np.zeros(len(column_positions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        data = np.ones(len(indices), dtype=np.bool_)
+        matrices.append(
+            sparse.csr_matrix(
+                (data, indices, indptr),
+                shape=(len(column_positions), n),
+            )
+        )
+    return sparse.hstack(matrices, format="csr")
 
-            exprs = []
-            for unique_value in unique_values:
-                expr = (
-                    pl.lit(unique_value)
-                    .is_in(pl.col(col))
-                    .alias(f"{col}_{unique_value}")
-                )
-                exprs.append(expr)
-            X_lazy = X_lazy.with_columns(exprs)
 
-        transformed = X_lazy.drop(list(self.mappings.keys())).collect()
+def _flatten_positions(
+    positions: pl.Series,
+    n_outputs: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the number of positions of each row and the positions of all rows.
 
-        return transformed
+    :param positions:
+        UInt32 positions, or lists of unique UInt32 positions.
+    :param n_outputs:
+        number of outputs, UInt32 positions equal to it are no category.
+    """
+    if positions.dtype == pl.List:
+        lengths = positions.list.len().fill_null(0)
+        indices = positions.explode().drop_nulls()
+    else:
+        is_value = positions < n_outputs
+        lengths = is_value.cast(pl.UInt32)
+        indices = positions.filter(is_value)
+    return lengths.to_numpy(), indices.to_numpy()
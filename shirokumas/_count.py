@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+from typing import Any
 from typing import Literal
 
 import polars as pl
 
-from ._base import BaseEncoder
+from ._base import _WEIGHT_COL
+from ._base import AdditiveEncoder
+from ._base import _lookup_table_exprs
+from ._base import _LookupTable
+from ._base import _with_sample_weight
+from ._exceptions import NotFittedException
 
 
-class CountEncoder(BaseEncoder):
+class CountEncoder(AdditiveEncoder):
     """Encode the number of categorical features per class."""
 
     def __init__(
@@ -33,34 +39,94 @@ class CountEncoder(BaseEncoder):
         super().__init__(cols, handle_unknown, handle_missing)
         self.mappings: dict[str, pl.DataFrame] = {}
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        cols = self.cols or X.columns
-        for col in cols:
-            self.mappings[col] = X.group_by(col).len()
+    def _sufficient_stats(
+        self,
+        X: pl.LazyFrame,
+        y: pl.Series | None,
+        by: list[str],
+        sample_weight: Any | None = None,
+        **fit_params,
+    ) -> dict[str, pl.DataFrame]:
+        aggs = [pl.len().cast(pl.Int64)]
+        if sample_weight is not None:
+            # weighted counts replace the numbers of rows
+            X = _with_sample_weight(X, sample_weight)
+            aggs.append(pl.col(_WEIGHT_COL).sum().alias("weight"))
 
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        unknown_value = -1
-        missing_value = -2
+        plans = [X.group_by([*by, col]).agg(aggs) for col in self.cols]
+        return dict(zip(self.cols, pl.collect_all(plans)))
+
+    def _fit_from_stats(self, stats: dict[str, pl.DataFrame]) -> None:
+        for col, stat in stats.items():
+            count = pl.col("weight" if "weight" in stat.columns else "len")
+            self.mappings[col] = stat.filter(pl.col(col).is_not_null()).select(
+                col, count.alias("len")
+            )
+
+    def partial_fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
+        """Add the counts of another batch to the fitted counts.
+
+        :param X:
+            explanatory feature.
+        :param y:
+            objective feature, not used.
+        """
+        batch_encoder = CountEncoder(
+            cols=self.cols,
+            handle_unknown=self.handle_unknown,
+            handle_missing=self.handle_missing,
+        )
+        batch_encoder.fit(X, y, **fit_params)
 
-        X_lazy: pl.LazyFrame = X.select(self.mappings.keys()).lazy()
+        if not self._fitted:
+            self.cols = batch_encoder.cols
+            self.mappings = batch_encoder.mappings
+            self._fitted = True
+            return self
 
-        for col, mapping in self.mappings.items():
-            remapping = {category: count for category, count in mapping.rows()}
-            remapping[None] = missing_value
-            expr = pl.col(col).replace_strict(
-                remapping,
-                default=unknown_value,
+        return self.merge(batch_encoder)
+
+    def merge(self, other: CountEncoder):
+        """Add the counts of another fitted encoder to this encoder.
+
+        :param other:
+            a fitted encoder, for example one trained on a different chunk of data.
+        """
+        if not (self.is_fitted and other.is_fitted):
+            raise NotFittedException("This encoder instance is not fitted yet")
+
+        for col, other_mapping in other.mappings.items():
+            if col not in self.mappings:
+                self.mappings[col] = other_mapping
+                continue
+
+            self.mappings[col] = (
+                pl.concat([self.mappings[col], other_mapping], how="vertical_relaxed")
+                .group_by(col, maintain_order=True)
+                .agg(pl.col("len").sum())
             )
-            X_lazy = X_lazy.with_columns(expr.alias(col))
 
-        transformed = X_lazy.collect()
+        self.cols = list(dict.fromkeys([*self.cols, *other.cols]))
+
+        return self
+
+    def _known_values(self) -> dict[str, pl.Series]:
+        return {col: mapping.get_column(col) for col, mapping in self.mappings.items()}
+
+    def _lookup_tables(self) -> dict[str, _LookupTable]:
+        unknown_value = -1
+        missing_value = -2
 
-        if self.handle_unknown == "error":
-            contains_unknown = transformed.select(pl.col("*") == unknown_value).sum()
-            for col in contains_unknown.columns:
-                if contains_unknown.get_column(col)[0] > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
+        return {
+            col: _LookupTable(mapping, [col], [unknown_value], [missing_value])
+            for col, mapping in self.mappings.items()
+        }
 
-        return transformed
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        # counts are Int64, or Float64 if fitted with weights
+        return _lookup_table_exprs(self._lookup_tables())
@@ -0,0 +1,104 @@
+"""Estimator interface of scikit-learn, without importing scikit-learn.
+
+Importing scikit-learn takes most of the import time of shirokumas,
+while encoding only needs the parameter handling of its estimators.
+The classes here follow the same conventions, so the encoders still work
+with clone(), Pipeline and the model selection tools of scikit-learn.
+"""
+
+from __future__ import annotations
+
+import copy
+import inspect
+from collections import defaultdict
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+
+_Estimator = TypeVar("_Estimator", bound="BaseEstimator")
+
+
+class BaseEstimator:
+    @classmethod
+    def _get_param_names(cls) -> list[str]:
+        init_signature = inspect.signature(cls.__init__)
+        return sorted(
+            name
+            for name, parameter in init_signature.parameters.items()
+            if name != "self" and parameter.kind != parameter.VAR_KEYWORD
+        )
+
+    def get_params(self, deep: bool = True) -> dict[str, Any]:
+        params = {}
+        for name in self._get_param_names():
+            value = getattr(self, name)
+            if deep and hasattr(value, "get_params") and not isinstance(value, type):
+                for nested_name, nested_value in value.get_params().items():
+                    params[f"{name}__{nested_name}"] = nested_value
+            params[name] = value
+        return params
+
+    def set_params(self, **params):
+        valid_params = self.get_params(deep=True)
+
+        nested_params: dict[str, dict[str, Any]] = defaultdict(dict)
+        for key, value in params.items():
+            name, delimiter, nested_name = key.partition("__")
+            if name not in valid_params:
+                raise ValueError(
+                    f"Invalid parameter {name!r} for estimator {self}. "
+                    f"Valid parameters are: {self._get_param_names()!r}."
+                )
+            if delimiter:
+                nested_params[name][nested_name] = value
+            else:
+                setattr(self, name, value)
+                valid_params[name] = value
+
+        for name, sub_params in nested_params.items():
+            valid_params[name].set_params(**sub_params)
+
+        return self
+
+    def __repr__(self) -> str:
+        # only the parameters changed from their defaults, as scikit-learn does
+        init_parameters = inspect.signature(type(self).__init__).parameters
+        changed_params = [
+            f"{name}={value!r}"
+            for name, value in self.get_params(deep=False).items()
+            if init_parameters[name].default is inspect.Parameter.empty
+            or repr(value) != repr(init_parameters[name].default)
+        ]
+        return f"{type(self).__name__}({', '.join(changed_params)})"
+
+    def __sklearn_tags__(self):
+        # only called by scikit-learn, which is imported already
+        from sklearn.utils import Tags
+        from sklearn.utils import TargetTags
+        from sklearn.utils import TransformerTags
+
+        tags = Tags(estimator_type=None, target_tags=TargetTags(required=False))
+        if isinstance(self, TransformerMixin):
+            tags.transformer_tags = TransformerTags()
+        return tags
+
+
+class TransformerMixin:
+    # implemented by the estimators mixing this in
+    fit: Callable[..., Any]
+
+    def fit_transform(self, X, y=None, **fit_params):
+        return self.fit(X, y, **fit_params).transform(X)
+
+
+def clone(estimator: _Estimator) -> _Estimator:
+    """Construct an unfitted estimator with the same parameters."""
+    params = {
+        name: (
+            clone(value)
+            if hasattr(value, "get_params") and not isinstance(value, type)
+            else copy.deepcopy(value)
+        )
+        for name, value in estimator.get_params(deep=False).items()
+    }
+    return type(estimator)(**params)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pickle
+import shutil
+from pathlib import Path
+from typing import Any
+from typing import cast
+
+import polars as pl
+
+_STATE_FILENAME = "encoder.pkl"
+_FRAMES_DIRNAME = "frames"
+
+
+class _FramePickler(pickle.Pickler):
+    """Pickler that writes polars objects to Arrow IPC files instead of the pickle."""
+
+    def __init__(self, file, frames_dir: Path):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.frames_dir = frames_dir
+        self.n_frames = 0
+
+    def persistent_id(self, obj: Any) -> tuple[str, str] | None:
+        if isinstance(obj, pl.DataFrame):
+            kind, frame = "DataFrame", obj
+        elif isinstance(obj, pl.Series):
+            kind, frame = "Series", obj.to_frame()
+        else:
+            return None
+
+        filename = f"{self.n_frames}.arrow"
+        self.n_frames += 1
+        # uncompressed IPC files can be memory-mapped when loading
+        frame.write_ipc(self.frames_dir / filename, compression="uncompressed")
+        return kind, filename
+
+
+class _FrameUnpickler(pickle.Unpickler):
+    def __init__(self, file, frames_dir: Path):
+        super().__init__(file)
+        self.frames_dir = frames_dir
+
+    def persistent_load(self, pid: tuple[str, str]) -> pl.DataFrame | pl.Series:
+        import pyarrow as pa
+
+        kind, filename = pid
+        # pl.read_ipc() copies the file, Arrow reads the buffers in the mapping
+        with pa.memory_map(str(self.frames_dir / filename)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        frame = cast(pl.DataFrame, pl.from_arrow(table, rechunk=False))
+        if kind == "Series":
+            return frame.to_series()
+        return frame
+
+
+def save_encoder(encoder: Any, path: str | Path) -> None:
+    """Save a fitted encoder into a directory.
+
+    The fitted mappings are stored as Arrow IPC files next to a small pickle
+    of the remaining state, so that they can be memory-mapped when loading.
+
+    :param encoder:
+        an encoder to save.
+    :param path:
+        a path to a directory, created if it does not exist.
+        an encoder saved there before is replaced.
+    """
+    path = Path(path)
+    frames_dir = path / _FRAMES_DIRNAME
+    # frames of a previous encoder would be left behind, or overwritten in place
+    # under an encoder that still memory-maps them
+    if frames_dir.exists():
+        shutil.rmtree(frames_dir)
+    frames_dir.mkdir(parents=True)
+
+    with open(path / _STATE_FILENAME, "wb") as fp:
+        _FramePickler(fp, frames_dir).dump(encoder)
+
+
+def load_encoder(path: str | Path) -> Any:
+    """Load an encoder saved by save_encoder().
+
+    The mappings are memory-mapped from the Arrow IPC files without copying them,
+    so processes loading the same directory share their pages.
+    The files must not be modified while the encoder is in use,
+    save_encoder() replaces them with new files instead.
+    Requires pyarrow, e.g. ``pip install shirokumas[io]``.
+
+    :param path:
+        a path to a directory written by save_encoder().
+    """
+    path = Path(path)
+
+    with open(path / _STATE_FILENAME, "rb") as fp:
+        return _FrameUnpickler(fp, path / _FRAMES_DIRNAME).load()
@@ -22,16 +22,15 @@ class NullEncoder(BaseEncoder):
         """
         super().__init__(cols, None, None)
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        self._target_cols = self.cols or X.columns
-
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.select(self._target_cols).lazy()
-
-        for col in self._target_cols:
-            expr = pl.when(pl.col(col).is_null()).then(1).otherwise(0).cast(pl.Boolean)
-            X_lazy = X_lazy.with_columns(expr.alias(col))
-
-        transformed = X_lazy.collect()
-
-        return transformed
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        self._target_cols = self.cols
+
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        return [
+            pl.when(pl.col(col).is_null())
+            .then(1)
+            .otherwise(0)
+            .cast(pl.Boolean)
+            .alias(col)
+            for col in self._target_cols
+        ]
@@ -1,87 +1,374 @@
 from __future__ import annotations
 
+import itertools
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Iterable
+from typing import Iterator
+from typing import Literal
 
 import polars as pl
-from polars.testing import assert_series_equal
-from sklearn.base import BaseEstimator
-from sklearn.base import TransformerMixin
-from sklearn.base import clone
-from sklearn.model_selection import BaseCrossValidator
 
+from ._base import _GROUP_COL
+from ._base import _MISSING_MESSAGE
+from ._base import _UNKNOWN_MESSAGE
+from ._base import AdditiveEncoder
 from ._base import BaseEncoder
+from ._base import _LookupTable
+from ._base import _validated
+from ._estimator import BaseEstimator
+from ._estimator import TransformerMixin
+from ._estimator import clone
 from ._exceptions import NotFittedException
 
+if TYPE_CHECKING:
+    import numpy as np
+    from sklearn.model_selection import BaseCrossValidator
+
+_FOLD_COL = "__shirokumas_fold"
+_VALUE_COL = "__shirokumas_value"
+
+# number of rows hashed to recognize the training data in transform()
+_FINGERPRINT_SAMPLE_SIZE = 1024
+
+
+def _fingerprint(X: pl.DataFrame) -> tuple:
+    """Identify a DataFrame by its shape and the hashes of evenly spaced rows."""
+    import numpy as np
+
+    n_samples = min(X.height, _FINGERPRINT_SAMPLE_SIZE)
+    indices = np.unique(np.linspace(0, X.height - 1, num=n_samples, dtype=np.int64))
+    row_hashes = X[indices].hash_rows(seed=42)
+    return tuple(X.columns), X.height, tuple(row_hashes.to_list())
+
+
+def _fold_ids(split_indices: list, n_rows: int) -> np.ndarray | None:
+    """Return the fold of each row if the evaluation rows partition the data
+    and the training rows of each fold are the rest."""
+    import numpy as np
+
+    dtype = np.min_scalar_type(-max(len(split_indices), 1))
+    fold_ids = np.full(n_rows, -1, dtype=dtype)
+    n_eval_rows = 0
+    for fold_id, (train_indices, eval_indices) in enumerate(split_indices):
+        if len(train_indices) + len(eval_indices) != n_rows:
+            return None
+        fold_ids[eval_indices] = fold_id
+        n_eval_rows += len(eval_indices)
+
+    if n_eval_rows != n_rows or (fold_ids == -1).any():
+        return None
+
+    # the training rows are derived from the fold ids, they must be the rest
+    for fold_id, (train_indices, _) in enumerate(split_indices):
+        train_indices = np.asarray(train_indices, dtype=np.intp)
+        # counting the rows is linear, unlike sorting them to find duplicates
+        if np.bincount(train_indices, minlength=n_rows).max(initial=0) > 1:
+            return None
+        if (fold_ids[train_indices] == fold_id).any():
+            return None
+    return fold_ids
+
+
+def _fit_clone(
+    encoder: BaseEncoder,
+    X: pl.DataFrame,
+    y: pl.Series | None,
+    indices: np.ndarray | None,
+    **fit_params,
+) -> BaseEncoder:
+    # gather the rows in the task, not to hold every fold in memory at once
+    if indices is not None:
+        X = X[indices]
+        y = y[indices] if y is not None else None
+        if fit_params.get("sample_weight") is not None:
+            sample_weight = pl.Series(fit_params["sample_weight"])[indices]
+            fit_params = {**fit_params, "sample_weight": sample_weight}
+    return clone(encoder).fit(X, y, **fit_params)
+
 
 class OutOfFoldEncodeWrapper(BaseEstimator, TransformerMixin):
     _test_encoder: BaseEncoder
-    _train_row_hashes: pl.Series
-    _train_col_names: list[str]
-    _split_indices: list
+    _train_fingerprint: tuple
+    _train_fold_ids: np.ndarray | None
+    _split_indices: list | None
+    _n_splits: int
 
     def __init__(
         self,
         inner: BaseEncoder,
         folds: Iterable | BaseCrossValidator,
         folds_params: dict[str, Any] | None = None,
+        fit_method: Literal["refit", "subtract"] = "refit",
+        n_jobs: int | None = None,
     ):
+        """
+
+        :param inner:
+            encoder to be fitted on the training rows of each fold.
+        :param folds:
+            (1) scikit-learn's BaseCrossValidator implemented instance.
+            (2) iterable object that provides tuples of row numbers for training and evaluation.
+        :param folds_params:
+            parameters when calling split() method, if you use BaseCrossValidator instance for folds.
+        :param fit_method:
+            how to fit the encoder of each fold.
+            defaults to 'refit', the inner encoder is fitted on the training rows of each fold.
+            if 'subtract' is selected, statistics are aggregated by fold and category in one pass,
+            and those of each fold are subtracted from the total.
+            it requires an inner encoder fitted from additive statistics,
+            and folds whose evaluation rows partition the data and whose training rows are the rest.
+        :param n_jobs:
+            number of encoders fitted concurrently by 'refit', in threads by default.
+            None means 1 and -1 means all processors, as in scikit-learn.
+            the fitted encoders do not depend on it.
+        """
         self.inner = inner
         self.folds = folds
         self.folds_params = folds_params
+        self.fit_method = fit_method
+        self.n_jobs = n_jobs
 
         self.train_encoders: list[BaseEncoder] = []
         self._fitted: bool = False
 
-    def fit(self, X: pl.DataFrame, y: pl.Series, **fit_params):
-        if isinstance(self.folds, BaseCrossValidator):
+    def fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
+        # splitting the rows into folds requires random access to them
+        X = X.lazy().collect()
+        self._fit(X, y, **fit_params)
+        return self
+
+    def fit_transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        """Fit the encoders and encode the training data out-of-fold."""
+        X_df = X.lazy().collect()
+        self._fit(X_df, y, **fit_params)
+
+        transformed_df = self._transform_train(X_df)
+        if isinstance(X, pl.LazyFrame):
+            return transformed_df.lazy()
+        return transformed_df
+
+    def _fit(self, X: pl.DataFrame, y: pl.Series | None, **fit_params):
+        # cross-validators of scikit-learn are recognized without importing it
+        if hasattr(self.folds, "split"):
             indices_iter = self.folds.split(X, y, **(self.folds_params or {}))
         else:
             indices_iter = self.folds
-        self._split_indices = list(indices_iter)
+        split_indices = list(indices_iter)
+        self._n_splits = len(split_indices)
+        # a fold id per row is much smaller than the indices of every fold,
+        # which are only kept if the folds do not partition the rows
+        self._train_fold_ids = _fold_ids(split_indices, X.height)
+        self._split_indices = (
+            None if self._train_fold_ids is not None else split_indices
+        )
 
-        n_splits = len(self._split_indices)
-        self.train_encoders = [clone(self.inner) for _ in range(n_splits)]
+        if self.fit_method == "subtract":
+            self._fit_subtract(X, y, **fit_params)
+        else:
+            self._fit_refit(X, y, **fit_params)
 
-        for encoder, (train_indices, _) in zip(
-            self.train_encoders, self._split_indices
-        ):
-            X_train, y_train = X[train_indices], y[train_indices]
-            encoder.fit(X_train, y_train, **fit_params)
+        self._train_fingerprint = _fingerprint(X)
+        self._fitted = True
 
-        self._test_encoder = clone(self.inner)
-        self._test_encoder.fit(X, y, **fit_params)
+    def _fit_refit(self, X: pl.DataFrame, y: pl.Series | None, **fit_params):
+        # the encoder of all rows is fitted along with the ones of the folds
+        indices_iter = itertools.chain(
+            (train_indices for train_indices, _ in self._split()), [None]
+        )
 
-        self._train_col_names = X.columns
-        self._train_row_hashes = X.hash_rows(seed=42)
-        self._fitted = True
+        from joblib import Parallel
+        from joblib import delayed
+
+        encoders = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(_fit_clone)(self.inner, X, y, indices, **fit_params)
+            for indices in indices_iter
+        )
+        *self.train_encoders, self._test_encoder = encoders
+
+    def _fit_subtract(self, X: pl.DataFrame, y: pl.Series | None, **fit_params):
+        if not isinstance(self.inner, AdditiveEncoder):
+            raise ValueError(
+                f"{type(self.inner).__name__} does not support fit_method='subtract'"
+            )
+
+        if self._train_fold_ids is None:
+            raise ValueError(
+                "fit_method='subtract' requires folds whose evaluation rows "
+                "partition the data and whose training rows are the rest"
+            )
+
+        n_splits = self._n_splits
+        fold_ids = pl.Series(self._train_fold_ids)
+        stats = clone(self.inner).fit_stats(X, y, fold_ids, **fit_params)
+
+        totals = {
+            col: stat.drop(_GROUP_COL).group_by(col).agg(pl.all().sum())
+            for col, stat in stats.items()
+        }
+        # statistics of the training rows = total - statistics of the evaluation rows
+        keys = [(fold_id, col) for fold_id in range(n_splits) for col in stats]
+        plans = [
+            pl.concat(
+                [
+                    totals[col].lazy(),
+                    stats[col]
+                    .lazy()
+                    .filter(pl.col(_GROUP_COL) == fold_id)
+                    .drop(_GROUP_COL)
+                    .with_columns(-pl.exclude(col)),
+                ]
+            )
+            .group_by(col)
+            .agg(pl.all().sum())
+            .filter(pl.col("len") > 0)
+            for fold_id, col in keys
+        ]
+        train_stats: list[dict[str, pl.DataFrame]] = [{} for _ in range(n_splits)]
+        for (fold_id, col), train_stat in zip(keys, pl.collect_all(plans)):
+            train_stats[fold_id][col] = train_stat
+
+        self.train_encoders = [
+            clone(self.inner).fit_with_stats(fold_stats) for fold_stats in train_stats
+        ]
+
+        self._test_encoder = clone(self.inner).fit_with_stats(totals)
+
+    def _split(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Yield the training and evaluation row numbers of each fold."""
+        if self._train_fold_ids is None:
+            yield from self._split_indices
+            return
+
+        import numpy as np
+
+        for fold_id in range(self._n_splits):
+            is_eval = self._train_fold_ids == fold_id
+            yield np.flatnonzero(~is_eval), np.flatnonzero(is_eval)
+
+    def set_inner_params(self, **params):
+        """Set parameters of the inner encoder and of the fitted ones."""
+        self.inner.set_params(**params)
+        if self._fitted:
+            for encoder in [*self.train_encoders, self._test_encoder]:
+                encoder.set_params(**params)
 
     def _is_train_df(self, X: pl.DataFrame) -> bool:
-        if self._train_col_names != X.columns:
-            return False
-        try:
-            other_row_hashes = X.hash_rows(seed=42)
-            assert_series_equal(self._train_row_hashes, other_row_hashes)
-            return True
-        except AssertionError:
+        # rows out of the sample are not compared, use fit_transform() to be sure
+        columns, height, _ = self._train_fingerprint
+        if (tuple(X.columns), X.height) != (columns, height):
             return False
+        return _fingerprint(X) == self._train_fingerprint
 
-    def transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
         if not self._fitted:
             raise NotFittedException("This encoder instance is not fitted yet")
 
-        if self._is_train_df(X):
-            return self._transform_train(X, **transform_params)
-        return self._transform_test(X, **transform_params)
+        # comparing a LazyFrame with the training data would run its query,
+        # so it is encoded lazily as other data, use fit_transform() for training
+        if isinstance(X, pl.LazyFrame) or not self._is_train_df(X):
+            return self._transform_test(X, **transform_params)
+        return self._transform_train(X, **transform_params)
 
     def _transform_train(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+        if self._train_fold_ids is not None:
+            # a hook of BaseEncoder, the wrapper is a part of the encoders
+            # pylint: disable-next=protected-access
+            tables = [encoder._lookup_tables() for encoder in self.train_encoders]
+            if all(table is not None for table in tables):
+                return self._transform_train_by_join(X, tables)
+
         transformed_dfs = []
-        for encoder, (_, eval_indices) in zip(self.train_encoders, self._split_indices):
+        for encoder, (_, eval_indices) in zip(self.train_encoders, self._split()):
             X_eval = X[eval_indices]
             transformed_df = encoder.transform(X_eval, **transform_params)
             transformed_dfs.append(transformed_df)
 
-        return pl.concat(transformed_dfs)
+        if self._train_fold_ids is None:
+            # rows are not evaluated exactly once, output them fold by fold
+            return pl.concat(transformed_dfs)
 
-    def _transform_test(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+        import numpy as np
+
+        # put the rows back in the input order, they are concatenated by fold
+        eval_indices = np.argsort(self._train_fold_ids, kind="stable")
+        return pl.concat(transformed_dfs)[np.argsort(eval_indices)]
+
+    def _transform_train_by_join(
+        self,
+        X: pl.DataFrame,
+        tables: list[dict[str, _LookupTable]],
+    ) -> pl.DataFrame:
+        fold_ids = pl.Series(_FOLD_COL, self._train_fold_ids)
+        X_lazy = X.lazy().with_columns(fold_ids)
+        fold_range = list(range(len(tables)))
+
+        exprs = []
+        for i, col in enumerate(tables[0]):
+            found_col = f"{_VALUE_COL}{i}"
+            outputs = tables[0][col].outputs
+            value_cols = [f"{_VALUE_COL}{i}_{j}" for j in range(len(outputs))]
+            stacked = pl.concat(
+                [
+                    table[col]
+                    .frame.lazy()
+                    .select(
+                        pl.lit(fold_id, dtype=fold_ids.dtype).alias(_FOLD_COL),
+                        pl.first(),
+                        pl.lit(True).alias(found_col),
+                        *[
+                            pl.nth(j + 1).alias(value_col)
+                            for j, value_col in enumerate(value_cols)
+                        ],
+                    )
+                    for fold_id, table in enumerate(tables)
+                ]
+            )
+            X_lazy = X_lazy.join(
+                stacked, on=[_FOLD_COL, col], how="left", maintain_order="left"
+            )
+
+            is_missing = pl.col(col).is_null()
+            is_unknown = pl.col(found_col).is_null() & is_missing.not_()
+            for j, (output, value_col) in enumerate(zip(outputs, value_cols)):
+                unknown_value = pl.col(_FOLD_COL).replace_strict(
+                    fold_range, [table[col].unknown_values[j] for table in tables]
+                )
+                missing_value = pl.col(_FOLD_COL).replace_strict(
+                    fold_range, [table[col].missing_values[j] for table in tables]
+                )
+                expr = (
+                    pl.when(is_missing)
+                    .then(missing_value)
+                    .when(is_unknown)
+                    .then(unknown_value)
+                    .otherwise(pl.col(value_col))
+                )
+                if self.inner.handle_unknown == "error":
+                    expr = _validated(expr, is_unknown, _UNKNOWN_MESSAGE)
+                if self.inner.handle_missing == "error":
+                    expr = _validated(expr, is_missing, _MISSING_MESSAGE)
+                exprs.append(expr.alias(output))
+
+        return X_lazy.select(exprs).collect()
+
+    def _transform_test(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
         return self._test_encoder.transform(X, **transform_params)
@@ -6,11 +6,14 @@ from typing import Literal
 import polars as pl
 
 from ._base import BaseEncoder
+from ._base import _lookup_expr
 
 
 class OrdinalEncoder(BaseEncoder):
     """Encode categorical features as ordinal values."""
 
+    _lookups: dict[str, pl.DataFrame]
+
     def __init__(
         self,
         cols: list[str] | None = None,
@@ -38,45 +41,83 @@ class OrdinalEncoder(BaseEncoder):
         self.mappings = mappings
         self.mappings_supplied = mappings is not None
 
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        if self.mappings_supplied:
-            return
+    @property
+    def mappings(self) -> dict[str, dict[str, int]] | None:
+        """Mappings between the original values and the values to be encoded.
 
-        self.mappings = {}
-        cols = self.cols or X.columns
-        for col in cols:
-            unique_values = X.get_column(col).unique(maintain_order=True).to_list()
-            self.mappings[col] = {
-                value: i for i, value in enumerate(unique_values, start=1)
+        Learned mappings are only kept as lookup frames, which are small to pickle,
+        so they are rebuilt as dicts on every access.
+        """
+        if self._mappings is None and hasattr(self, "_lookups"):
+            return {
+                col: dict(
+                    zip(
+                        lookup.get_column(col).to_list(),
+                        lookup.get_column("ordinal").to_list(),
+                    )
+                )
+                for col, lookup in self._lookups.items()
             }
+        return self._mappings
+
+    @mappings.setter
+    def mappings(self, mappings: dict[str, dict[str, int]] | None):
+        self._mappings = mappings
+
+    def _fit(self, X: pl.LazyFrame, y: pl.Series | None = None, **fit_params):
+        if not self.mappings_supplied:
+            plans = [
+                X.select(pl.col(col).unique(maintain_order=True)) for col in self.cols
+            ]
+            # the values are numbered in order of appearance, missing values included
+            self._mappings = None
+            self._lookups = {
+                col: unique_df.with_row_index("ordinal", offset=1)
+                .select(col, pl.col("ordinal").cast(pl.Int64))
+                .filter(pl.col(col).is_not_null())
+                for col, unique_df in zip(self.cols, pl.collect_all(plans))
+            }
+            return
+
+        if self.handle_missing == "error":
+            # nothing else scans the input, so evaluate the validation explicitly
+            X.select(pl.col(self.cols).null_count()).collect()
+
+        self._lookups = self._compile_lookups(self._mappings or {})
+
+    @staticmethod
+    def _compile_lookups(
+        mappings: dict[str, dict[str, int]],
+    ) -> dict[str, pl.DataFrame]:
+        lookups = {}
+        for col, remapping in mappings.items():
+            items = [(k, v) for k, v in remapping.items() if k is not None]
+            lookups[col] = pl.DataFrame(
+                {
+                    col: [k for k, _ in items],
+                    "ordinal": [v for _, v in items],
+                }
+            )
+        return lookups
 
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        if self.mappings is None:
+    def _known_values(self) -> dict[str, pl.Series]:
+        return {col: lookup.get_column(col) for col, lookup in self._lookups.items()}
+
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        if self._mappings is None and not self._lookups:
             warnings.warn("no mappings exists, nothing to do")
-            self.mappings = {}
 
         unknown_value = -1
         missing_value = -2
 
-        X_lazy: pl.LazyFrame = X.select(self.mappings.keys()).lazy()
-
-        for col in self.mappings.keys():
-            remapping = self.mappings[col]
-            remapping[None] = missing_value
-            expr = pl.col(col).replace_strict(
-                remapping,
-                default=unknown_value,
-            )
-            X_lazy = X_lazy.with_columns(expr.alias(col))
-
-        transformed = X_lazy.collect()
-
-        if self.handle_unknown == "error":
-            contains_unknown = transformed.select(pl.col("*") == unknown_value).sum()
-            for col in contains_unknown.columns:
-                if contains_unknown.get_column(col)[0] > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
-
-        return transformed
+        return [
+            _lookup_expr(
+                col,
+                lookup.get_column(col),
+                lookup.get_column("ordinal"),
+                unknown_value,
+                missing_value,
+                return_dtype=pl.Int64(),
+            ).alias(col)
+            for col, lookup in self._lookups.items()
+        ]
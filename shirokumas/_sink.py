@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+from typing import Literal
+
+import polars as pl
+
+from ._base import BaseEncoder
+
+_SCANNERS: dict[str, Callable[..., pl.LazyFrame]] = {
+    ".parquet": pl.scan_parquet,
+    ".arrow": pl.scan_ipc,
+    ".ipc": pl.scan_ipc,
+    ".feather": pl.scan_ipc,
+    ".csv": pl.scan_csv,
+}
+
+_SINKS: dict[str, Callable[..., None]] = {
+    "parquet": pl.LazyFrame.sink_parquet,
+    "ipc": pl.LazyFrame.sink_ipc,
+}
+
+
+def sink_transform(
+    encoder: BaseEncoder,
+    source: str | Path | pl.LazyFrame,
+    path: str | Path,
+    file_format: Literal["parquet", "ipc"] = "parquet",
+    **sink_params,
+) -> None:
+    """Transform a dataset with a fitted encoder and stream the result into a file.
+
+    The input is scanned and the output is written by Polars' streaming engine,
+    so neither of them has to fit in memory.
+
+    :param encoder:
+        a fitted encoder, whose output is not sparse.
+        a target encoder encodes the source with the statistics of all the training rows,
+        use fit_transform() for the out-of-fold encoding of the training data.
+    :param source:
+        a LazyFrame, or a path to a Parquet, Arrow IPC or CSV file to be scanned.
+    :param path:
+        a path to write the transformed data to.
+    :param file_format:
+        file format of the output.
+        defaults to 'parquet', 'ipc' writes Arrow IPC.
+    :param sink_params:
+        parameters passed to LazyFrame.sink_parquet() or LazyFrame.sink_ipc().
+    """
+    # checked before the transform, which may already read the source
+    if file_format not in _SINKS:
+        raise ValueError(f"Unsupported file format to sink: {file_format}")
+    if getattr(encoder, "sparse_output", False):
+        raise ValueError("A sparse output can not be sunk, set sparse_output=False")
+
+    if isinstance(source, pl.LazyFrame):
+        X = source
+    else:
+        suffix = Path(source).suffix.lower()
+        if suffix not in _SCANNERS:
+            raise ValueError(f"Unsupported file format to scan: {suffix}")
+        X = _SCANNERS[suffix](source)
+
+    transformed = encoder.transform(X)
+    _SINKS[file_format](transformed, path, **sink_params)
@@ -1,23 +1,28 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
 from typing import Any
 from typing import Iterable
 from typing import Literal
 
 import polars as pl
-from scipy.special import expit  # pylint: disable=no-name-in-module
-from sklearn.base import BaseEstimator
-from sklearn.base import TransformerMixin
-from sklearn.model_selection import BaseCrossValidator
 
-from . import OutOfFoldEncodeWrapper
-from ._base import BaseEncoder
+from ._base import _WEIGHT_COL
+from ._base import AdditiveEncoder
+from ._base import _lookup_table_exprs
+from ._base import _LookupTable
+from ._base import _with_sample_weight
+from ._estimator import BaseEstimator
+from ._estimator import TransformerMixin
+from ._estimator import clone
+from ._exceptions import NotFittedException
+from ._oof import OutOfFoldEncodeWrapper
 
-_UNKNOWN_VALUE = -1.0
-_MISSING_VALUE = -2.0
+if TYPE_CHECKING:
+    from sklearn.model_selection import BaseCrossValidator
 
 
-class _GreedyTargetEncoder(BaseEncoder):
+class _GreedyTargetEncoder(AdditiveEncoder):
     def __init__(
         self,
         smoothing_method: Literal["none", "m-estimate", "eb"] = "none",
@@ -25,196 +30,285 @@ class _GreedyTargetEncoder(BaseEncoder):
         cols: list[str] | None = None,
         handle_unknown: Literal["value", "error"] = "value",
         handle_missing: Literal["value", "error"] = "value",
+        classes: list | None = None,
     ):
         super().__init__(cols, handle_unknown, handle_missing)
         self.smoothing_method = smoothing_method
         self.smoothing_params = smoothing_params
+        self.classes = classes
+
+        # the statistics do not depend on smoothing, which is applied at transform
+        self.stats: dict[str, pl.DataFrame] = {}
+        # a mean per class if classes are given
+        self.global_mean: pl.PythonLiteral | list[pl.PythonLiteral] | None = None
+
+    def sum_cols(self) -> list[str]:
+        """Names of the summed targets in the statistics."""
+        if self.classes is None:
+            return ["sum"]
+        return [f"sum_{i}" for i in range(len(self.classes))]
+
+    def targets(self, y_name: str) -> list[pl.Expr]:
+        """Targets to be summed, a column per sum."""
+        if self.classes is None:
+            return [pl.col(y_name)]
+        # one-vs-rest indicators of every class, summed in the same pass
+        return [pl.col(y_name) == value for value in self.classes]
+
+    def global_means(self) -> list[pl.PythonLiteral | None]:
+        """Means of the targets, a value per sum."""
+        if self.classes is None:
+            return [self.global_mean]
+        return self.global_mean
+
+    def outputs(self, col: str) -> list[str]:
+        """Names of the encoded columns of a column, a name per sum."""
+        if self.classes is None:
+            return [col]
+        return [f"{col}_{value}" for value in self.classes]
+
+    def smoothed_exprs(self) -> list[pl.Expr]:
+        """Encoded values computed from the statistics, a column per sum."""
+        strategy = self._smoothing_strategy()
+        # categories whose targets are all missing have no mean, as in ordered mode
+        no_target = pl.col("count") == 0
+        return [
+            pl.when(no_target)
+            .then(global_mean)
+            .otherwise(strategy.smoothed_expr(pl.col(sum_col), global_mean))
+            .alias(sum_col)
+            for sum_col, global_mean in zip(self.sum_cols(), self.global_means())
+        ]
+
+    def _sufficient_stats(
+        self,
+        X: pl.LazyFrame,
+        y: pl.Series | None,
+        by: list[str],
+        sample_weight: Any | None = None,
+        **fit_params,
+    ) -> dict[str, pl.DataFrame]:
+        if y is None:
+            raise ValueError("Need 'y' parameter")
+
+        # 'weight' and 'count' are the weighted numbers of rows and of targets
+        weight = pl.col(_WEIGHT_COL)
+        sums = [
+            (target * weight).sum().cast(pl.Float64).alias(sum_col)
+            for target, sum_col in zip(self.targets(y.name), self.sum_cols())
+        ]
+
+        X_lazy = _with_sample_weight(X.with_columns(y), sample_weight)
+        plans = [
+            X_lazy.group_by([*by, col]).agg(
+                pl.len().cast(pl.Int64).alias("len"),
+                weight.sum().alias("weight"),
+                weight.filter(pl.col(y.name).is_not_null()).sum().alias("count"),
+                *sums,
+            )
+            for col in self.cols
+        ]
+        return dict(zip(self.cols, pl.collect_all(plans)))
+
+    def _fit_from_stats(self, stats: dict[str, pl.DataFrame]) -> None:
+        sum_cols = self.sum_cols()
+
+        # every column partitions the same rows, the first one is enough
+        totals = next(iter(stats.values())).select(pl.col("count", *sum_cols).sum())
+        count, *totals_of_sums = totals.row(0)
+        global_means = [total / count if count else None for total in totals_of_sums]
+        self.global_mean = global_means if self.classes is not None else global_means[0]
+
+        self.stats = {
+            col: stat.filter(pl.col(col).is_not_null()).select(
+                col, "weight", "count", *sum_cols
+            )
+            for col, stat in stats.items()
+        }
 
-        encoder_classes = {
+    def _smoothing_strategy(self) -> _SmoothingStrategy:
+        strategy_classes: dict[str, type[_SmoothingStrategy]] = {
             "none": _NoneSmoothingStrategy,
             "m-estimate": _MEstimateStrategy,
             "eb": _EmpiricalBayesianStrategy,
         }
-        encoder_cls = encoder_classes[self.smoothing_method]
-        self.encoder: BaseEncoder = encoder_cls(
-            **(self.smoothing_params or {}),
-        )
-        self.global_mean: pl.PythonLiteral | None = None
-
-    def _fit(self, X: pl.DataFrame, y: pl.Series | None = None, **fit_params):
-        if y is None:
-            raise ValueError("Need 'y' parameter")
-
-        self.cols = self.cols or X.columns
-        self.global_mean = y.mean()
-
-        X = X.select(self.cols)
-        return self.encoder.fit(X, y, **fit_params)
-
-    def _transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
-        cols = self.cols or X.columns
-
-        X = X.select(cols)
-
-        transformed = self.encoder.transform(X, **transform_params)
-
-        if self.handle_unknown == "error":
-            contains_unknown = transformed.select(pl.col("*") == _UNKNOWN_VALUE).sum()
-            for col in contains_unknown.columns:
-                if contains_unknown.get_column(col)[0] > 0:
-                    raise ValueError(
-                        "Columns to be encoded can not contain unknown value"
-                    )
-
-        transformed_lazy: pl.LazyFrame = transformed.lazy()
-
-        for col in cols:
-            col_value_is_missing: pl.Expr = pl.col(col) == _MISSING_VALUE
-            col_value_is_unknown: pl.Expr = pl.col(col) == _UNKNOWN_VALUE
-            replace_expr = (
-                pl.when(col_value_is_missing | col_value_is_unknown)
-                .then(self.global_mean)
-                .otherwise(pl.col(col))
+        strategy_cls = strategy_classes[self.smoothing_method]
+        return strategy_cls(**(self.smoothing_params or {}))
+
+    def _known_values(self) -> dict[str, pl.Series]:
+        return {col: stat.get_column(col) for col, stat in self.stats.items()}
+
+    def _lookup_tables(self) -> dict[str, _LookupTable]:
+        smoothed = self.smoothed_exprs()
+        global_means = self.global_means()
+        return {
+            col: _LookupTable(
+                stat.select(col, *smoothed),
+                self.outputs(col),
+                global_means,
+                global_means,
             )
-            transformed_lazy = transformed_lazy.with_columns(replace_expr.alias(col))
-
-        return transformed_lazy.collect()
+            for col, stat in self.stats.items()
+        }
 
+    def _transform_exprs(self, **transform_params) -> list[pl.Expr]:
+        return _lookup_table_exprs(self._lookup_tables(), return_dtype=pl.Float64())
 
-class _NoneSmoothingStrategy(BaseEstimator, TransformerMixin):
-    def __init__(self):
-        self.mappings: dict[str, pl.DataFrame] = {}
 
-    def fit(self, X: pl.DataFrame, y: pl.Series):
-        X_lazy: pl.LazyFrame = X.lazy().with_columns(y)
+class _SmoothingStrategy(BaseEstimator):
+    def smoothed_expr(self, sum_: pl.Expr, global_mean: float | None) -> pl.Expr:
+        """Encoded value computed from the sum of the target and the 'weight' and
+        'count' statistics."""
+        raise NotImplementedError()
 
-        for col in X.columns:
-            local_df = (
-                X_lazy.group_by(col)
-                .agg(
-                    [
-                        pl.col(y.name).mean().alias(f"{col}_mean"),
-                    ]
-                )
-                .collect()
-            )
-            self.mappings[col] = local_df
-
-    def transform(self, X: pl.DataFrame) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.lazy()
-
-        for col in self.mappings.keys():
-            remapping = {
-                category: local_mean
-                for category, local_mean in self.mappings[col].rows()
-            }
-            remapping[None] = _MISSING_VALUE
-            expr = pl.col(col).replace_strict(
-                remapping,
-                default=_UNKNOWN_VALUE,
-            )
-            X_lazy = X_lazy.with_columns(expr.alias(col))
 
-        return X_lazy.collect()
+class _NoneSmoothingStrategy(_SmoothingStrategy):
+    def smoothed_expr(self, sum_: pl.Expr, global_mean: float | None) -> pl.Expr:
+        return sum_ / pl.col("count")
 
 
-class _MEstimateStrategy(BaseEstimator, TransformerMixin):
-
+class _MEstimateStrategy(_SmoothingStrategy):
     def __init__(self, m: float = 1.0):
         self.m = m
 
-        self.mappings: dict[str, pl.DataFrame] = {}
-        self.global_mean: pl.PythonLiteral | None = None
-
-    def fit(self, X: pl.DataFrame, y: pl.Series):
-        self.global_mean = y.mean()
+    def smoothed_expr(self, sum_: pl.Expr, global_mean: float | None) -> pl.Expr:
+        return (sum_ + self.m * global_mean) / (pl.col("count") + self.m)
 
-        X_lazy: pl.LazyFrame = X.lazy().with_columns(y)
 
-        for col in X.columns:
-            local_df = (
-                X_lazy.group_by(col)
-                .agg(
-                    [
-                        pl.col(y.name).count().alias(f"{col}_count"),
-                        pl.col(y.name).sum().alias(f"{col}_sum"),
-                    ]
-                )
-                .collect()
-            )
-            self.mappings[col] = local_df
-
-    def transform(self, X: pl.DataFrame) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.lazy()
+class _EmpiricalBayesianStrategy(_SmoothingStrategy):
+    def __init__(self, k: int = 20, f: int = 10):
+        self.k = k
+        self.f = f
 
-        for col in self.mappings.keys():
-            remapping = {
-                category: (
-                    (local_sum + self.m * self.global_mean) / (local_count + self.m)
-                )
-                for category, local_count, local_sum in self.mappings[col].rows()
-            }
-            remapping[None] = _MISSING_VALUE
-            expr = pl.col(col).replace_strict(
-                remapping,
-                default=_UNKNOWN_VALUE,
-            )
-            X_lazy = X_lazy.with_columns(expr.alias(col))
+    def smoothed_expr(self, sum_: pl.Expr, global_mean: float | None) -> pl.Expr:
+        mean = sum_ / pl.col("count")
+        exponent = (pl.col("weight") - self.k) / self.f
+        # sigmoid, exp() overflowing to inf still gives the limit 0
+        lambda_ = 1 / (1 + (-exponent).exp())
+        return lambda_ * mean + (1 - lambda_) * global_mean
 
-        return X_lazy.collect()
 
+class _OrderedEncodeWrapper(BaseEstimator, TransformerMixin):
+    """Encode each training row with the statistics of the rows before it.
 
-class _EmpiricalBayesianStrategy(BaseEstimator, TransformerMixin):
-    def __init__(self, k: int = 20, f: int = 10):
-        self.k = k
-        self.f = f
+    Rows are ordered by a column, e.g. time, or else by a random permutation.
+    The training rows are only encoded so by fit_transform(), transform() encodes
+    any data with the statistics of all the training rows.
+    """
 
-        self.mappings: dict[str, pl.DataFrame] = {}
-        self.global_mean: pl.PythonLiteral | None = None
+    _test_encoder: _GreedyTargetEncoder
 
-    def fit(self, X: pl.DataFrame, y: pl.Series):
-        self.global_mean = y.mean()
+    def __init__(
+        self,
+        inner: _GreedyTargetEncoder,
+        order_by: str | None = None,
+        random_state: int | None = None,
+    ):
+        self.inner = inner
+        self.order_by = order_by
+        self.random_state = random_state
 
-        X_lazy: pl.LazyFrame = X.lazy().with_columns(y)
+        self._fitted: bool = False
 
-        for col in X.columns:
-            local_df = (
-                X_lazy.group_by(col)
-                .agg(
-                    [
-                        pl.col(y.name).mean().alias(f"{col}_mean"),
-                        (
-                            (pl.col(col).count().cast(pl.Float64) - self.k) / self.f
-                        ).alias(f"{col}_exp"),
-                    ]
-                )
-                .with_columns(
-                    expit(pl.col(f"{col}_exp")).alias(f"{col}_lambda"),
+    def fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
+        encoder = clone(self.inner)
+        if self.order_by is not None:
+            # the column ordering the rows is not a category
+            if encoder.cols is None:
+                cols = X.collect_schema().names()
+                encoder.set_params(cols=[col for col in cols if col != self.order_by])
+            elif self.order_by in encoder.cols:
+                raise ValueError(
+                    f"order_by column {self.order_by!r} can not be encoded"
                 )
-                .drop(f"{col}_exp")
-                .collect()
-            )
-            self.mappings[col] = local_df
-
-    def transform(self, X: pl.DataFrame) -> pl.DataFrame:
-        X_lazy: pl.LazyFrame = X.lazy()
+        self._test_encoder = encoder.fit(X, y, **fit_params)
+        self._fitted = True
+        return self
 
-        for col in self.mappings.keys():
-            remapping = {
-                category: (
-                    smoothing_factor * local_mean
-                    + (1 - smoothing_factor) * self.global_mean
+    def fit_transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        X_df = X.lazy().collect()
+        self.fit(X_df, y, **fit_params)
+
+        # the statistics of the preceding rows are as large as the training data,
+        # they are encoded right away instead of being kept
+        sample_weight = fit_params.get("sample_weight")
+        transformed_df = self._transform_train(X_df, y, sample_weight)
+        if isinstance(X, pl.LazyFrame):
+            return transformed_df.lazy()
+        return transformed_df
+
+    def set_inner_params(self, **params):
+        """Set parameters of the inner encoder and of the fitted one."""
+        self.inner.set_params(**params)
+        if self._fitted:
+            self._test_encoder.set_params(**params)
+
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        if not self._fitted:
+            raise NotFittedException("This encoder instance is not fitted yet")
+        return self._test_encoder.transform(X, **transform_params)
+
+    def _transform_train(
+        self,
+        X: pl.DataFrame,
+        y: pl.Series,
+        sample_weight: Any | None,
+    ) -> pl.DataFrame:
+        encoder = self._test_encoder
+        global_means = encoder.global_means()
+        smoothed = encoder.smoothed_exprs()
+
+        if self.order_by is not None:
+            order = pl.col(self.order_by)
+        else:
+            import numpy as np
+
+            rng = np.random.default_rng(self.random_state)
+            order = pl.lit(pl.Series(rng.permutation(X.height)))
+
+        # the cumulative sums include the row itself, which is subtracted
+        weight = pl.col(_WEIGHT_COL)
+        counted = weight * pl.col(y.name).is_not_null()
+        targets = [
+            (target * weight).cast(pl.Float64).fill_null(0.0)
+            for target in encoder.targets(y.name)
+        ]
+        X_lazy = _with_sample_weight(X.lazy().with_columns(y), sample_weight)
+        plans = []
+        for col in encoder.cols:
+            sums = [
+                (target.cum_sum() - target).over(col, order_by=order).alias(sum_col)
+                for target, sum_col in zip(targets, encoder.sum_cols())
+            ]
+            # missing values and first occurrences have no statistics
+            no_stats = pl.col(col).is_null() | (pl.col("count") == 0)
+            plan = X_lazy.select(
+                col,
+                (weight.cum_sum() - weight).over(col, order_by=order).alias("weight"),
+                (counted.cum_sum() - counted).over(col, order_by=order).alias("count"),
+                *sums,
+            ).select(
+                pl.when(no_stats).then(global_mean).otherwise(expr).alias(output)
+                for expr, global_mean, output in zip(
+                    smoothed, global_means, encoder.outputs(col)
                 )
-                for category, local_mean, smoothing_factor in self.mappings[col].rows()
-            }
-            remapping[None] = _MISSING_VALUE
-            expr = pl.col(col).replace_strict(
-                remapping,
-                default=_UNKNOWN_VALUE,
             )
-            X_lazy = X_lazy.with_columns(expr.alias(col))
-
-        return X_lazy.collect()
+            plans.append(plan)
+        return pl.concat(pl.collect_all(plans), how="horizontal")
 
 
 class TargetEncoder(BaseEstimator, TransformerMixin):
@@ -222,13 +316,18 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
 
     def __init__(
         self,
-        folds: Iterable | BaseCrossValidator,
+        folds: Iterable | BaseCrossValidator | Literal["ordered"],
         folds_params: dict[str, Any] | None = None,
         smoothing_method: Literal["none", "m-estimate", "eb"] = "none",
         smoothing_params: dict[str, Any] | None = None,
         cols: list[str] | None = None,
         handle_unknown: Literal["value", "error"] = "value",
         handle_missing: Literal["value", "error"] = "value",
+        fit_method: Literal["refit", "subtract"] = "refit",
+        n_jobs: int | None = None,
+        multiclass: bool = False,
+        order_by: str | None = None,
+        random_state: int | None = None,
     ):
         """
 
@@ -236,6 +335,10 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
             to prevent data leakage, use hold-out target statistics.
             (1) scikit-learn's BaseCrossValidator implemented instance.
             (2) iterable object that provides tuples of row numbers for training and evaluation.
+            (3) 'ordered', each training row is encoded with the statistics of the rows before it,
+            in the order of order_by column or else of a random permutation.
+            only fit_transform() encodes the training rows so, transform() uses the statistics
+            of all the training rows for any data.
         :param folds_params:
             parameters when calling split() method, if you use BaseCrossValidator instance for folds.
         :param smoothing_method:
@@ -258,6 +361,24 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
             choice of handling missing values.
             defaults to 'value', missing values are replaced by global mean.
             If 'error' is selected, ValueError is thrown when a missing value is encountered.
+        :param fit_method:
+            how to fit the target statistics of each fold.
+            defaults to 'refit', statistics are aggregated again on the training rows of each fold.
+            if 'subtract' is selected, statistics are aggregated by fold and category in one pass,
+            and those of each fold are subtracted from the total.
+            it requires folds whose evaluation rows partition the data and whose training rows
+            are the rest, e.g. KFold.
+        :param n_jobs:
+            number of folds fitted concurrently by 'refit'.
+            None means 1 and -1 means all processors, as in scikit-learn.
+        :param multiclass:
+            if True, y holds class labels and a column is encoded into the rate of each class,
+            named '{column}_{class}'. defaults to False, y is numeric.
+        :param order_by:
+            column ordering the training rows, e.g. time, if 'ordered' is selected for folds.
+            it is not encoded, if None is specified for cols.
+        :param random_state:
+            seed of the random permutation, if 'ordered' is selected for folds without order_by.
         """
         self.folds = folds
         self.folds_params = folds_params
@@ -266,23 +387,81 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
         self.cols = cols
         self.handle_unknown = handle_unknown
         self.handle_missing = handle_missing
+        self.fit_method = fit_method
+        self.n_jobs = n_jobs
+        self.multiclass = multiclass
+        self.order_by = order_by
+        self.random_state = random_state
+
+        self.encoder = self._make_encoder()
 
+    def _make_encoder(self) -> OutOfFoldEncodeWrapper | _OrderedEncodeWrapper:
         inner_encoder = _GreedyTargetEncoder(
-            smoothing_method=smoothing_method,
-            smoothing_params=smoothing_params,
-            cols=cols,
-            handle_unknown=handle_unknown,
-            handle_missing=handle_missing,
+            smoothing_method=self.smoothing_method,
+            smoothing_params=self.smoothing_params,
+            cols=self.cols,
+            handle_unknown=self.handle_unknown,
+            handle_missing=self.handle_missing,
         )
-        self.encoder = OutOfFoldEncodeWrapper(
+        if isinstance(self.folds, str) and self.folds == "ordered":
+            return _OrderedEncodeWrapper(
+                inner=inner_encoder,
+                order_by=self.order_by,
+                random_state=self.random_state,
+            )
+        return OutOfFoldEncodeWrapper(
             inner=inner_encoder,
-            folds=folds,
-            folds_params=folds_params,
+            folds=self.folds,
+            folds_params=self.folds_params,
+            fit_method=self.fit_method,
+            n_jobs=self.n_jobs,
         )
 
-    def fit(self, X: pl.DataFrame, y: pl.Series, **fit_params):
+    def set_params(self, **params):
+        """Set the parameters of this encoder.
+
+        Smoothing is applied to the fitted statistics at transform time,
+        so changing only smoothing_method or smoothing_params keeps the encoder fitted.
+        Changing any other parameter requires fitting again.
+        """
+        super().set_params(**params)
+
+        smoothing_keys = {"smoothing_method", "smoothing_params"}
+        if params.keys() <= smoothing_keys:
+            self.encoder.set_inner_params(**params)
+        else:
+            self.encoder = self._make_encoder()
+        return self
+
+    def _set_classes(self, y: pl.Series | None):
+        # a missing target is reported by the encoder
+        if self.multiclass and y is not None:
+            classes = y.drop_nulls().unique().sort().to_list()
+            self.encoder.set_inner_params(classes=classes)
+
+    def fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
+        self._set_classes(y)
         self.encoder.fit(X, y, **fit_params)
         return self
 
-    def transform(self, X: pl.DataFrame, **transform_params) -> pl.DataFrame:
+    def fit_transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        """Fit the encoder and encode the training data with hold-out statistics."""
+        self._set_classes(y)
+        return self.encoder.fit_transform(X, y, **fit_params)
+
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
         return self.encoder.transform(X, **transform_params)
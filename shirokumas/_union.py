@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import itertools
+
+import polars as pl
+
+from ._base import BaseEncoder
+from ._estimator import BaseEstimator
+from ._estimator import TransformerMixin
+from ._exceptions import NotFittedException
+
+
+class EncoderUnion(BaseEstimator, TransformerMixin):
+    """Concatenate the results of several encoders computed in a single query."""
+
+    def __init__(
+        self,
+        encoders: list[tuple[str, BaseEncoder]],
+    ):
+        """
+
+        :param encoders:
+            a list of tuples of a name and an encoder.
+            the name is prepended to the encoded column names as '{name}__{column}'.
+        """
+        self.encoders = encoders
+
+        self._fitted: bool = False
+
+    def fit(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ):
+        """Train all the encoders.
+
+        :param X:
+            explanatory feature.
+        :param y:
+            objective feature.
+        """
+        for _, encoder in self.encoders:
+            encoder.fit(X, y, **fit_params)
+
+        self._fitted = True
+
+        return self
+
+    def fit_transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        y: pl.Series | None = None,
+        **fit_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        """Train all the encoders and transform the training data.
+
+        The encoders other than BaseEncoder subclasses encode the training data
+        by their own fit_transform(), e.g. out-of-fold for TargetEncoder.
+
+        :param X:
+            explanatory feature.
+        :param y:
+            objective feature.
+        """
+        others: dict[int, pl.DataFrame | pl.LazyFrame] = {}
+        for i, (_, encoder) in enumerate(self.encoders):
+            if isinstance(encoder, BaseEncoder):
+                encoder.fit(X, y, **fit_params)
+            else:
+                others[i] = encoder.fit_transform(X, y, **fit_params)
+
+        self._fitted = True
+
+        return self._concat(X, others)
+
+    def transform(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        """Transform the features with all the encoders.
+
+        The expressions of BaseEncoder subclasses are merged into one selection,
+        so the input is read only once. The other encoders transform the input
+        as given and their results are concatenated horizontally.
+
+        :param X:
+            explanatory feature.
+            if a LazyFrame is given, a LazyFrame is returned without being collected.
+        """
+        if not self._fitted:
+            raise NotFittedException("This encoder instance is not fitted yet")
+
+        # the input is passed as given, a wrapper of folds recognizes its training data
+        others = {
+            i: encoder.transform(X, **transform_params)
+            for i, (_, encoder) in enumerate(self.encoders)
+            if not isinstance(encoder, BaseEncoder)
+        }
+
+        return self._concat(X, others, **transform_params)
+
+    def _concat(
+        self,
+        X: pl.DataFrame | pl.LazyFrame,
+        others: dict[int, pl.DataFrame | pl.LazyFrame],
+        **transform_params,
+    ) -> pl.DataFrame | pl.LazyFrame:
+        """Merge the BaseEncoder subclasses into one query and concatenate
+        their results with the others in the order of the encoders."""
+        checked = X.lazy()
+        exprs: list[pl.Expr] = []
+        n_exprs: dict[int, int] = {}
+        for i, (name, encoder) in enumerate(self.encoders):
+            if not isinstance(encoder, BaseEncoder):
+                continue
+
+            if not encoder.is_fitted:
+                raise NotFittedException("This encoder instance is not fitted yet")
+
+            # the steps of BaseEncoder._transform(), merged into one query
+            # pylint: disable=protected-access
+            checked = encoder._prepare(encoder._check_input(checked))
+            encoder_exprs = encoder._transform_exprs(**transform_params)
+            # pylint: enable=protected-access
+            exprs.extend(expr.name.prefix(f"{name}__") for expr in encoder_exprs)
+            n_exprs[i] = len(encoder_exprs)
+
+        merged = checked.select(exprs)
+        others_lazy = {
+            i: transformed.lazy().select(
+                pl.all().name.prefix(f"{self.encoders[i][0]}__")
+            )
+            for i, transformed in others.items()
+        }
+
+        # the merged selection outputs the columns of each encoder in turn
+        merged_cols = iter(merged.collect_schema().names())
+        cols: list[str] = []
+        for i in range(len(self.encoders)):
+            if i in others_lazy:
+                cols.extend(others_lazy[i].collect_schema().names())
+            else:
+                cols.extend(itertools.islice(merged_cols, n_exprs[i]))
+
+        transformed = merged
+        if others_lazy:
+            transformed = pl.concat(
+                [merged, *others_lazy.values()], how="horizontal"
+            ).select(cols)
+
+        if isinstance(X, pl.LazyFrame):
+            return transformed
+        return transformed.collect()
@@ -0,0 +1,328 @@
+"""Benchmark fit and transform of the encoders.
+
+Run ``python -m shirokumas.benchmark --help`` for the available options.
+Each measurement is written as a JSON line so that results of different
+versions of shirokumas or Polars can be compared mechanically.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Iterator
+
+import numpy as np
+import polars as pl
+from sklearn.model_selection import KFold
+
+import shirokumas as sk
+
+_BINARIZERS = ("OneHotEncoder", "MultiLabelBinarizer")
+
+ENCODER_FACTORIES: dict[str, Callable[[list[str]], Any]] = {
+    "AggregateEncoder": lambda cols: sk.AggregateEncoder(
+        cols=cols,
+        agg_exprs={"mean": pl.col("value").mean()},
+    ),
+    "CountEncoder": lambda cols: sk.CountEncoder(cols=cols),
+    "NullEncoder": lambda cols: sk.NullEncoder(cols=cols),
+    "OneHotEncoder": lambda cols: sk.OneHotEncoder(cols=cols),
+    "MultiLabelBinarizer": lambda cols: sk.MultiLabelBinarizer(cols=cols),
+    "OrdinalEncoder": lambda cols: sk.OrdinalEncoder(cols=cols),
+    "TargetEncoder": lambda cols: sk.TargetEncoder(
+        folds=KFold(n_splits=5, shuffle=True, random_state=42),
+        cols=cols,
+    ),
+}
+
+DTYPES = ("str", "categorical", "int")
+
+# modules that importing shirokumas should not load, they are only needed
+# for fold splitters, parallel fitting, sparse or packed output
+# and the integration with scikit-learn
+HEAVY_MODULES = ("numpy", "sklearn", "scipy", "joblib", "polars.testing")
+
+_IMPORT_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import shirokumas
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+class _PeakMemoryMonitor:
+    """Sample the resident set size in a background thread to find its peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> _PeakMemoryMonitor:
+        self.baseline = self.peak = _current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss())
+
+    @property
+    def peak_increase(self) -> int:
+        return self.peak - self.baseline
+
+
+def _current_rss() -> int:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # peak rather than current usage, but the best available without procfs
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def make_dataset(
+    n_rows: int,
+    cardinality: int,
+    n_cols: int,
+    dtype: str,
+    list_columns: bool = False,
+    seed: int = 42,
+) -> tuple[pl.DataFrame, pl.Series, list[str]]:
+    """Generate random categorical columns, a numeric column and a binary target.
+
+    :param n_rows:
+        number of rows.
+    :param cardinality:
+        number of distinct categories in each column.
+    :param n_cols:
+        number of categorical columns.
+    :param dtype:
+        'str', 'categorical' or 'int'.
+    :param list_columns:
+        wrap each category into a list, for MultiLabelBinarizer.
+    """
+    rng = np.random.default_rng(seed)
+    cols = [f"col{i}" for i in range(n_cols)]
+
+    columns = {}
+    for col in cols:
+        codes = pl.Series(col, rng.integers(0, cardinality, size=n_rows))
+        if dtype == "int":
+            column = codes
+        elif dtype == "str":
+            column = codes.cast(pl.String)
+        elif dtype == "categorical":
+            column = codes.cast(pl.String).cast(pl.Categorical)
+        else:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        if list_columns:
+            column = column.to_frame().select(pl.concat_list(col)).to_series()
+        columns[col] = column
+
+    columns["value"] = pl.Series("value", rng.random(n_rows))
+    X = pl.DataFrame(columns)
+    y = pl.Series("target", rng.integers(0, 2, size=n_rows))
+    return X, y, cols
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> dict[str, float | int]:
+    seconds = []
+    peak_memory = []
+    for _ in range(repeat):
+        with _PeakMemoryMonitor() as monitor:
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+        peak_memory.append(monitor.peak_increase)
+    return {
+        "seconds": min(seconds),
+        "seconds_median": float(np.median(seconds)),
+        "peak_memory_bytes": max(peak_memory),
+    }
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "shirokumas_version": sk.__version__,
+        "polars_version": pl.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def measure_import(repeat: int = 3) -> dict[str, Any]:
+    """Measure the time to import shirokumas in fresh interpreters.
+
+    :param repeat:
+        number of interpreters started, the fastest import is reported.
+    """
+    seconds = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        result = json.loads(completed.stdout)
+        seconds.append(result["seconds"])
+
+    return {
+        "phase": "import",
+        "seconds": min(seconds),
+        "seconds_median": float(np.median(seconds)),
+        "heavy_modules": [
+            module for module in HEAVY_MODULES if module in result["modules"]
+        ],
+    }
+
+
+def run_benchmark(
+    encoders: list[str],
+    rows: list[int],
+    cardinalities: list[int],
+    n_cols: list[int],
+    dtypes: list[str],
+    repeat: int = 3,
+    max_binarize_cardinality: int = 1000,
+) -> Iterator[dict[str, Any]]:
+    """Measure fit and transform for every combination of the parameters.
+
+    :param encoders:
+        names of the encoders, keys of ENCODER_FACTORIES.
+    :param rows:
+        numbers of rows.
+    :param cardinalities:
+        numbers of distinct categories per column.
+    :param n_cols:
+        numbers of categorical columns.
+    :param dtypes:
+        dtypes of the categorical columns, 'str', 'categorical' or 'int'.
+    :param repeat:
+        number of repetitions, the fastest one is reported.
+    :param max_binarize_cardinality:
+        binarizers output a column per category, larger cardinalities are skipped.
+    """
+    environment = _environment()
+
+    cases = itertools.product(encoders, rows, cardinalities, n_cols, dtypes)
+    for encoder_name, n_rows, cardinality, n_col, dtype in cases:
+        if encoder_name in _BINARIZERS and cardinality > max_binarize_cardinality:
+            continue
+
+        list_columns = encoder_name == "MultiLabelBinarizer"
+        X, y, cols = make_dataset(
+            n_rows, cardinality, n_col, dtype, list_columns=list_columns
+        )
+        # new data to transform, the training data would be encoded out-of-fold
+        X_new, _, _ = make_dataset(
+            n_rows, cardinality, n_col, dtype, list_columns=list_columns, seed=43
+        )
+        encoder = ENCODER_FACTORIES[encoder_name](cols)
+        case = {
+            "encoder": encoder_name,
+            "rows": n_rows,
+            "cardinality": cardinality,
+            "n_cols": n_col,
+            "dtype": dtype,
+        }
+
+        result = _measure(functools.partial(encoder.fit, X, y), repeat)
+        yield {**case, "phase": "fit", **result, **environment}
+
+        result = _measure(functools.partial(encoder.transform, X_new), repeat)
+        yield {**case, "phase": "transform", **result, **environment}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m shirokumas.benchmark",
+        description="Benchmark fit and transform of the shirokumas encoders.",
+    )
+    parser.add_argument(
+        "--encoders",
+        nargs="+",
+        choices=sorted(ENCODER_FACTORIES),
+        default=sorted(ENCODER_FACTORIES),
+    )
+    parser.add_argument(
+        "--rows", nargs="+", type=int, default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--cardinalities", nargs="+", type=int, default=[10, 1_000, 100_000]
+    )
+    parser.add_argument("--n-cols", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--dtypes", nargs="+", choices=DTYPES, default=list(DTYPES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-binarize-cardinality", type=int, default=1000)
+    parser.add_argument(
+        "--import-time",
+        action="store_true",
+        help="measure the time to import shirokumas instead of the encoders",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="path to write JSON lines to, defaults to standard output",
+    )
+    args = parser.parse_args(argv)
+
+    if args.import_time:
+        results = iter([{**measure_import(args.repeat), **_environment()}])
+    else:
+        results = run_benchmark(
+            encoders=args.encoders,
+            rows=args.rows,
+            cardinalities=args.cardinalities,
+            n_cols=args.n_cols,
+            dtypes=args.dtypes,
+            repeat=args.repeat,
+            max_binarize_cardinality=args.max_binarize_cardinality,
+        )
+
+    output = (
+        sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    )
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
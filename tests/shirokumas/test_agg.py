@@ -197,6 +197,36 @@ class TestAggregateEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "price": [100, 200, 300],
+            }
+        )
+        encoder = AggregateEncoder(
+            cols=["fruits"],
+            agg_exprs={
+                "max": pl.col("price").max(),
+            },
+        )
+        encoder.fit(train_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+            }
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_max": [-1, -2, 300],
+            },
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from shirokumas.benchmark import ENCODER_FACTORIES
+from shirokumas.benchmark import main
+from shirokumas.benchmark import measure_import
+from shirokumas.benchmark import run_benchmark
+
+
+class TestBenchmark:
+    def test_run_benchmark(self):
+        results = list(
+            run_benchmark(
+                encoders=sorted(ENCODER_FACTORIES),
+                rows=[100],
+                cardinalities=[5],
+                n_cols=[2],
+                dtypes=["str", "categorical", "int"],
+                repeat=1,
+            )
+        )
+
+        assert len(results) == len(ENCODER_FACTORIES) * 3 * 2
+        for result in results:
+            assert result["phase"] in ("fit", "transform")
+            assert result["seconds"] >= 0
+
+    def test_skip_binarizers(self):
+        results = list(
+            run_benchmark(
+                encoders=["OneHotEncoder"],
+                rows=[100],
+                cardinalities=[5, 50],
+                n_cols=[1],
+                dtypes=["int"],
+                repeat=1,
+                max_binarize_cardinality=10,
+            )
+        )
+
+        assert {result["cardinality"] for result in results} == {5}
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            output = os.path.join(dirname, "results.jsonl")
+            main(
+                [
+                    "--encoders",
+                    "CountEncoder",
+                    "--rows",
+                    "100",
+                    "--cardinalities",
+                    "5",
+                    "--n-cols",
+                    "1",
+                    "--dtypes",
+                    "str",
+                    "--repeat",
+                    "1",
+                    "--output",
+                    output,
+                ]
+            )
+            with open(output) as fp:
+                results = [json.loads(line) for line in fp]
+
+        assert [result["phase"] for result in results] == ["fit", "transform"]
+
+    def test_measure_import(self):
+        result = measure_import(repeat=1)
+
+        assert result["phase"] == "import"
+        assert result["seconds"] > 0
+        # encoding must not wait for scikit-learn and friends to load
+        assert result["heavy_modules"] == []
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-svv"]))
@@ -5,7 +5,9 @@ import numpy as np
 import polars as pl
 import pytest
 from polars.testing import assert_frame_equal
+from scipy import sparse
 
+from shirokumas import EncoderUnion
 from shirokumas import MultiLabelBinarizer
 from shirokumas import OneHotEncoder
 from shirokumas._exceptions import NotFittedException
@@ -174,6 +176,242 @@ class TestOneHotEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        encoder = OneHotEncoder()
+        encoder.fit(train_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+            },
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [False, False, False],
+                "fruits_banana": [False, False, True],
+            }
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
+    def test_missing_in_fit(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", None, "banana"],
+            }
+        )
+        encoder = OneHotEncoder()
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["banana", None, "unseen"],
+            },
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [False, False, False],
+                "fruits_None": [False, False, False],
+                "fruits_banana": [True, False, False],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_union(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        union = EncoderUnion(
+            [
+                ("all", OneHotEncoder()),
+                ("test", OneHotEncoder()),
+            ]
+        )
+        union.fit(train_df)
+        union.encoders[1][1].fit(pl.DataFrame({"fruits": ["banana", "cherry"]}))
+
+        encoded_df = union.transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "all__fruits_apple": [True, False, False],
+                "all__fruits_banana": [False, True, True],
+                "test__fruits_banana": [False, True, True],
+                "test__fruits_cherry": [False, False, False],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_max_categories(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "cherry", "cherry", None],
+            }
+        )
+        encoder = OneHotEncoder(max_categories=2)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "cherry", "unseen", None],
+            },
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_banana": [False, True, False, False, False],
+                "fruits_cherry": [False, False, True, False, False],
+                "fruits_infrequent_shirokumas": [True, False, False, False, False],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        encoder = OneHotEncoder(max_categories=2, handle_unknown="error")
+        encoder.fit(train_df)
+        encoder.transform(test_df.head(3))
+
+        with pytest.raises(ValueError):
+            encoder.transform(test_df)
+
+    def test_max_categories_other_category(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["other"] * 3 + ["apple"] * 2 + ["banana", "cherry"],
+            }
+        )
+        encoder = OneHotEncoder(max_categories=2)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["other", "apple", "cherry"],
+            },
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_other": [True, False, False],
+                "fruits_apple": [False, True, False],
+                "fruits_infrequent_shirokumas": [False, False, True],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        # a category kept under the name of the shared column is rejected
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["infrequent_shirokumas"] * 2 + ["apple"],
+            }
+        )
+        encoder = OneHotEncoder(max_categories=1)
+        with pytest.raises(ValueError):
+            encoder.fit(train_df)
+
+    @pytest.mark.parametrize("min_frequency", [2, 0.3])
+    def test_min_frequency(self, min_frequency):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "cherry", "cherry", "cherry"],
+            }
+        )
+        encoder = OneHotEncoder(min_frequency=min_frequency, sparse_output=True)
+        encoder.fit(train_df)
+        encoded = encoder.transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_banana": [False, True, True, False, False, False],
+                "fruits_cherry": [False, False, False, True, True, True],
+                "fruits_infrequent_shirokumas": [
+                    True,
+                    False,
+                    False,
+                    False,
+                    False,
+                    False,
+                ],
+            }
+        )
+        assert encoder.get_feature_names_out() == expected_df.columns
+        np.testing.assert_array_equal(encoded.toarray(), expected_df.to_numpy())
+
+    def test_packed_output(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "charlie"],
+            }
+        )
+        encoder = OneHotEncoder(packed_output=True)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+                "users": ["alice", "charlie", None],
+            },
+        )
+        packed_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_packed_0": [0, 0, 0b10],
+                "users_packed_0": [0b1, 0b100, 0],
+            },
+            schema={"fruits_packed_0": pl.UInt64, "users_packed_0": pl.UInt64},
+        )
+        assert_frame_equal(packed_df, expected_df)
+
+        expected_df = OneHotEncoder().fit(train_df).transform(test_df)
+        assert_frame_equal(encoder.unpack(packed_df), expected_df)
+
+        with pytest.raises(ValueError):
+            OneHotEncoder(packed_output=True, sparse_output=True).fit(train_df)
+
+    def test_sparse_output(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "charlie"],
+            }
+        )
+        encoder = OneHotEncoder(sparse_output=True)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+                "users": ["alice", "unseen", None],
+            },
+        )
+        encoded = encoder.transform(test_df.lazy())
+        assert sparse.isspmatrix_csr(encoded)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [False, False, False],
+                "fruits_banana": [False, False, True],
+                "users_alice": [True, False, False],
+                "users_bob": [False, False, False],
+                "users_charlie": [False, False, False],
+            }
+        )
+        assert encoder.get_feature_names_out() == expected_df.columns
+        np.testing.assert_array_equal(encoded.toarray(), expected_df.to_numpy())
+
 
 class TestMultiLabelBinarizer:
     def test(self):
@@ -516,6 +754,214 @@ class TestMultiLabelBinarizer:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["apple"],
+                    ["banana"],
+                    ["apple", "banana"],
+                ],
+            }
+        )
+        encoder = MultiLabelBinarizer()
+        encoder.fit(train_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["unseen"],
+                    ["banana", "apple"],
+                    ["banana"],
+                ],
+            }
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [False, True, False],
+                "fruits_banana": [False, True, True],
+            }
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
+    def test_missing_list(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["apple"],
+                    ["banana"],
+                    ["apple", "banana"],
+                ],
+            }
+        )
+        encoder = MultiLabelBinarizer()
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": [
+                    None,
+                    [],
+                    ["banana", "apple", "banana"],
+                ],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [False, False, True],
+                "fruits_banana": [False, False, True],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_many_labels(self):
+        # the labels span several words of 64 bits
+        train_df = pl.DataFrame(
+            {
+                "labels": [list(range(130))],
+            }
+        )
+        encoder = MultiLabelBinarizer()
+        encoder.fit(train_df)
+
+        test_lists = [[0, 63, 64], [129], [127, 128, 1, 63]]
+        test_df = pl.DataFrame(
+            {
+                "labels": test_lists,
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                f"labels_{label}": [label in labels for labels in test_lists]
+                for label in range(130)
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_label_order(self):
+        # labels are in order of appearance, however lists are deduplicated
+        labels = [f"label{i}" for i in range(100)]
+        train_df = pl.DataFrame(
+            {
+                "labels": [labels[:50], labels[25:], labels[::-1]],
+            }
+        )
+        for encoder in [
+            MultiLabelBinarizer(),
+            MultiLabelBinarizer(max_categories=100),
+        ]:
+            encoder.fit(train_df)
+            names = [f"labels_{label}" for label in labels]
+            assert encoder.get_feature_names_out() == names
+
+    def test_max_categories(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["apple", "banana", "banana"],
+                    ["banana"],
+                    ["apple", "cherry"],
+                    ["durian"],
+                ],
+            }
+        )
+        encoder = MultiLabelBinarizer(max_categories=1)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["apple", "durian"],
+                    ["unseen"],
+                    ["banana", "cherry"],
+                ],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [True, False, False],
+                "fruits_infrequent_shirokumas": [True, False, True],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_packed_output(self):
+        train_df = pl.DataFrame(
+            {
+                "labels": [list(range(130))],
+            }
+        )
+        encoder = MultiLabelBinarizer(packed_output=True)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "labels": [[0, 63, 64], [129], None],
+            }
+        )
+        packed_lazy = encoder.transform(test_df.lazy())
+
+        expected_df = pl.DataFrame(
+            {
+                "labels_packed_0": [1 | 1 << 63, 0, 0],
+                "labels_packed_1": [1, 0, 0],
+                "labels_packed_2": [0, 1 << 1, 0],
+            },
+            schema={f"labels_packed_{i}": pl.UInt64 for i in range(3)},
+        )
+        assert_frame_equal(packed_lazy.collect(), expected_df)
+
+        unpacked_lazy = encoder.unpack(packed_lazy)
+        assert isinstance(unpacked_lazy, pl.LazyFrame)
+
+        expected_df = MultiLabelBinarizer().fit(train_df).transform(test_df)
+        assert_frame_equal(unpacked_lazy.collect(), expected_df)
+
+    def test_sparse_output(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["apple"],
+                    ["banana"],
+                    ["apple", "banana"],
+                ],
+            }
+        )
+        encoder = MultiLabelBinarizer(sparse_output=True)
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": [
+                    ["unseen", "apple"],
+                    ["banana", "apple", "banana"],
+                    [None],
+                    None,
+                ],
+            }
+        )
+        encoded = encoder.transform(test_df)
+        assert sparse.isspmatrix_csr(encoded)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_apple": [True, True, False, False],
+                "fruits_banana": [False, True, False, False],
+            }
+        )
+        assert encoder.get_feature_names_out() == expected_df.columns
+        np.testing.assert_array_equal(encoded.toarray(), expected_df.to_numpy())
+        assert encoded.has_sorted_indices
+
 
 if __name__ == "__main__":
     import sys
@@ -133,6 +133,108 @@ class TestCountEncoder:
         with pytest.raises(ValueError):
             encoder.transform(test_df)
 
+    def test_handle_uknown_error_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        encoder = CountEncoder(handle_unknown="error")
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry"],
+            }
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        with pytest.raises(ValueError):
+            encoded_lazy.collect()
+
+    def test_sample_weight(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", None, "cherry"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df, sample_weight=[2.0, 0.5, 1.0, 1.0, 3.0])
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "cherry", "unseen", None],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [2.0, 1.5, 3.0, -1.0, -2.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_partial_fit(self):
+        first_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        second_df = pl.DataFrame(
+            {
+                "fruits": ["banana", "cherry", None],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.partial_fit(first_df)
+        encoder.partial_fit(second_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "cherry", "unseen", None],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1, 2, 1, -1, -2],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_merge(self):
+        first_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        second_df = pl.DataFrame(
+            {
+                "fruits": ["banana", "banana"],
+            }
+        )
+        encoder = CountEncoder().fit(first_df)
+        encoder.merge(CountEncoder().fit(second_df))
+        encoded_df = encoder.transform(first_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1, 3],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_merge_not_fitted(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        encoder = CountEncoder().fit(train_df)
+        with pytest.raises(NotFittedException):
+            encoder.merge(CountEncoder())
+
     def test_pickle(self):
         train_df = pl.DataFrame(
             {
@@ -165,6 +267,58 @@ class TestCountEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_categorical(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            },
+            schema={"fruits": pl.Categorical},
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+            },
+            schema={"fruits": pl.Categorical},
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [-1, -2, 2],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "carol"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+                "users": ["alice", "unseen", None],
+            },
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [-1, -2, 2],
+                "users": [1, -1, -2],
+            },
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,66 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from sklearn.base import clone
+from sklearn.model_selection import KFold
+from sklearn.pipeline import make_pipeline
+
+from shirokumas import CountEncoder
+from shirokumas import NullEncoder
+from shirokumas import OutOfFoldEncodeWrapper
+from shirokumas import TargetEncoder
+
+
+class TestEstimator:
+    def test_params(self):
+        encoder = OutOfFoldEncodeWrapper(
+            inner=CountEncoder(cols=["fruits"]),
+            folds=KFold(n_splits=2),
+        )
+        params = encoder.get_params()
+        assert params["inner__cols"] == ["fruits"]
+        assert params["fit_method"] == "refit"
+
+        encoder.set_params(inner__handle_unknown="error", n_jobs=2)
+        assert encoder.inner.handle_unknown == "error"
+        assert encoder.n_jobs == 2
+
+        with pytest.raises(ValueError):
+            encoder.set_params(unknown_param=1)
+
+    def test_repr(self):
+        encoder = TargetEncoder(folds=KFold(n_splits=4), smoothing_method="eb")
+        assert repr(encoder) == (
+            "TargetEncoder("
+            "folds=KFold(n_splits=4, random_state=None, shuffle=False), "
+            "smoothing_method='eb')"
+        )
+        assert repr(CountEncoder()) == "CountEncoder()"
+
+    def test_sklearn_clone(self):
+        encoder = TargetEncoder(folds=KFold(n_splits=4), smoothing_method="eb")
+        cloned_encoder = clone(encoder)
+        assert cloned_encoder is not encoder
+        assert repr(cloned_encoder) == repr(encoder)
+
+    def test_sklearn_pipeline(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", None, "banana", "apple"],
+            }
+        )
+        pipeline = make_pipeline(CountEncoder(), NullEncoder())
+        encoded_df = pipeline.fit_transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [False, False, False, False],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-svv"]))
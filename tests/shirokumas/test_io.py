@@ -0,0 +1,188 @@
+import os
+import tempfile
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from sklearn.model_selection import KFold
+
+from shirokumas import CountEncoder
+from shirokumas import OneHotEncoder
+from shirokumas import OrdinalEncoder
+from shirokumas import TargetEncoder
+from shirokumas import load_encoder
+from shirokumas import save_encoder
+
+
+class TestSaveLoadEncoder:
+    def test(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "carol"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(encoder, dirname)
+            assert os.listdir(os.path.join(dirname, "frames"))
+            loaded_encoder = load_encoder(dirname)
+
+            test_df = pl.DataFrame(
+                {
+                    "fruits": ["cherry", "banana", "apple"],
+                    "users": ["carol", "bob", "alice"],
+                }
+            )
+            encoded_df = loaded_encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [-1, 2, 1],
+                "users": [1, 1, 1],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_series(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        encoder = OneHotEncoder()
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(encoder, dirname)
+            loaded_encoder = load_encoder(dirname)
+            encoded_df = loaded_encoder.transform(train_df)
+
+        assert_frame_equal(encoded_df, encoder.transform(train_df))
+
+    @pytest.mark.skipif(
+        not os.path.exists("/proc/self/maps"), reason="requires /proc/self/maps"
+    )
+    def test_memory_map(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "carol"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(encoder, dirname)
+            loaded_encoder = load_encoder(dirname)
+
+            frames_dir = os.path.realpath(os.path.join(dirname, "frames"))
+            with open("/proc/self/maps", encoding="utf-8") as fp:
+                mapped_ranges = [
+                    [int(address, 16) for address in line.split()[0].split("-")]
+                    for line in fp
+                    if frames_dir in line
+                ]
+
+            # the buffers of the loaded frames are in the files, not copied
+            for mapping in loaded_encoder.mappings.values():
+                for series in mapping.iter_columns():
+                    array = series.to_arrow(compat_level=pl.CompatLevel.newest())
+                    for buffer in array.buffers():
+                        if buffer is None or buffer.size == 0:
+                            continue
+                        assert any(
+                            start <= buffer.address < end
+                            for start, end in mapped_ranges
+                        )
+
+    def test_ordinal_mappings(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [f"fruit_{i}" for i in range(10000)],
+            }
+        )
+        encoder = OrdinalEncoder()
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(encoder, dirname)
+            # the learned mappings are saved as frames, not in the pickle
+            assert os.path.getsize(os.path.join(dirname, "encoder.pkl")) < 1024
+            loaded_encoder = load_encoder(dirname)
+
+            assert loaded_encoder.mappings == encoder.mappings
+            assert_frame_equal(
+                loaded_encoder.transform(train_df), encoder.transform(train_df)
+            )
+
+    def test_overwrite(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "carol"],
+            }
+        )
+        large_encoder = CountEncoder()
+        large_encoder.fit(train_df)
+        small_encoder = CountEncoder(cols=["fruits"])
+        small_encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(large_encoder, dirname)
+            n_large_frames = len(os.listdir(os.path.join(dirname, "frames")))
+            loaded_encoder = load_encoder(dirname)
+
+            save_encoder(small_encoder, dirname)
+            n_small_frames = len(os.listdir(os.path.join(dirname, "frames")))
+            assert n_small_frames < n_large_frames
+
+            # the encoder loaded before keeps its own frames
+            assert_frame_equal(
+                loaded_encoder.transform(train_df), large_encoder.transform(train_df)
+            )
+            assert_frame_equal(
+                load_encoder(dirname).transform(train_df),
+                small_encoder.transform(train_df),
+            )
+
+    def test_nested(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        encoder = TargetEncoder(folds=folds)
+        encoder.fit(train_df, train_y)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            save_encoder(encoder, dirname)
+            loaded_encoder = load_encoder(dirname)
+
+            test_df = pl.DataFrame(
+                {
+                    "fruits": ["apple", "cherry", "banana", "apple"],
+                }
+            )
+            encoded_df = loaded_encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1.0, 0.75, 0.5, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-svv"]))
@@ -106,6 +106,26 @@ class TestNullEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": [None, "banana", "banana"],
+                "prices": [None, 100, 200],
+            }
+        )
+        encoder = NullEncoder()
+        encoder.fit(train_df.lazy())
+        encoded_lazy = encoder.transform(train_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [True, False, False],
+                "prices": [True, False, False],
+            },
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
 
 if __name__ == "__main__":
     import sys
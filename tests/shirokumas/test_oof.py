@@ -1,9 +1,13 @@
+import numpy as np
 import polars as pl
 import pytest
 from polars.testing import assert_frame_equal
 from sklearn.model_selection import KFold
 
+from shirokumas import CountEncoder
+from shirokumas import OrdinalEncoder
 from shirokumas import OutOfFoldEncodeWrapper
+from shirokumas._oof import _fold_ids
 from shirokumas._target import _GreedyTargetEncoder
 
 
@@ -81,6 +85,337 @@ class TestOutOfFoldEncodeWrapper:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_fit_transform(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds
+        )
+        encoded_df = outer_encoder.fit_transform(train_df, train_y)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1.0, 1.0, 0.0, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        encoded_lazy = outer_encoder.fit_transform(train_df.lazy(), train_y)
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
+    @pytest.mark.parametrize(
+        "inner_encoder",
+        [
+            _GreedyTargetEncoder(smoothing_method="m-estimate"),
+            CountEncoder(),
+            OrdinalEncoder(),
+        ],
+    )
+    def test_train_row_order(self, inner_encoder):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", None, "apple", "cherry", "banana"],
+                "users": ["alice", "bob", "alice", "alice", "bob", "bob"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0, 1],
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        outer_encoder = OutOfFoldEncodeWrapper(inner=inner_encoder, folds=folds)
+        encoded_df = outer_encoder.fit_transform(train_df, train_y)
+
+        row_folds = {}
+        for fold, (_, eval_indices) in enumerate(folds.split(train_df, train_y)):
+            row_folds.update(dict.fromkeys(eval_indices, fold))
+
+        expected_dfs = [
+            outer_encoder.train_encoders[row_folds[row]].transform(
+                train_df.slice(row, 1)
+            )
+            for row in range(train_df.height)
+        ]
+        assert_frame_equal(encoded_df, pl.concat(expected_dfs))
+
+    def test_train_handle_unknown_error(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple", "cherry"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0],
+        )
+        folds = KFold(n_splits=5, shuffle=False)
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(handle_unknown="error"), folds=folds
+        )
+        with pytest.raises(ValueError):
+            outer_encoder.fit_transform(train_df, train_y)
+
+    @pytest.mark.parametrize("fit_method", ["refit", "subtract"])
+    def test_without_y(self, fit_method):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "apple", "banana", "apple"],
+            }
+        )
+        folds = KFold(n_splits=2, shuffle=False)
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=CountEncoder(), folds=folds, fit_method=fit_method
+        )
+        encoded_df = outer_encoder.fit_transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1, 1, -1, 2],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_n_jobs(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", None, "apple", "cherry", "banana"],
+                "users": ["alice", "bob", "alice", "alice", "bob", "bob"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0, 1],
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        serial_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds
+        )
+        parallel_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds, n_jobs=-1
+        )
+
+        assert_frame_equal(
+            parallel_encoder.fit_transform(train_df, train_y),
+            serial_encoder.fit_transform(train_df, train_y),
+        )
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "unseen", None],
+                "users": ["bob", "alice", "carol"],
+            }
+        )
+        assert_frame_equal(
+            parallel_encoder.transform(test_df),
+            serial_encoder.transform(test_df),
+        )
+
+    def test_fold_ids(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple", "cherry", "banana"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0, 1],
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        outer_encoder = OutOfFoldEncodeWrapper(inner=CountEncoder(), folds=folds)
+        outer_encoder.fit(train_df, train_y)
+
+        assert outer_encoder._split_indices is None
+        assert outer_encoder._train_fold_ids.dtype == np.int8
+        for (train_indices, eval_indices), (expected_train, expected_eval) in zip(
+            outer_encoder._split(), folds.split(train_df, train_y)
+        ):
+            np.testing.assert_array_equal(train_indices, expected_train)
+            np.testing.assert_array_equal(eval_indices, expected_eval)
+
+    def test_fold_ids_without_sorting(self, monkeypatch):
+        def sort(*args, **kwargs):
+            raise AssertionError("the rows of the folds must not be sorted")
+
+        # duplicates among the training rows are found without sorting them
+        monkeypatch.setattr(np, "unique", sort)
+        monkeypatch.setattr(np, "sort", sort)
+        monkeypatch.setattr(np, "argsort", sort)
+
+        n_rows = 10_000
+        folds = list(
+            KFold(n_splits=5, shuffle=True, random_state=42).split(np.arange(n_rows))
+        )
+        fold_ids = _fold_ids(folds, n_rows)
+
+        assert fold_ids is not None
+        for fold_id, (_, eval_indices) in enumerate(folds):
+            assert (fold_ids[eval_indices] == fold_id).all()
+
+    def test_fold_ids_duplicated_train_indices(self):
+        # the training rows have the right number, but one of them twice
+        folds = [([1, 1], [0]), ([0], [1, 2])]
+
+        assert _fold_ids(folds, 3) is None
+
+    def test_train_indices_not_complement(self):
+        train_df = pl.DataFrame(
+            {
+                "a": ["x", "x", "y", "y"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        # evaluation rows partition the data, but training rows are not the rest
+        folds = [([0, 2], [2, 3]), ([1, 3], [0, 1])]
+        outer_encoder = OutOfFoldEncodeWrapper(inner=CountEncoder(), folds=folds)
+        outer_encoder.fit(train_df, train_y)
+        encoded_df = outer_encoder.transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "a": [1, 1, 1, 1],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_same_shape_test_df(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds
+        )
+        outer_encoder.fit(train_df, train_y)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "apple", "apple"],
+            }
+        )
+        encoded_df = outer_encoder.transform(test_df)
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1.0, 0.5, 1.0, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    @pytest.mark.parametrize(
+        "fruits, expected",
+        [
+            # even the training data, which is only encoded out-of-fold eagerly
+            (["apple", "banana", "banana", "apple"], [1.0, 0.5, 0.5, 1.0]),
+            # other data of the same shape and of another height
+            (["apple", "banana", "apple", "apple"], [1.0, 0.5, 1.0, 1.0]),
+            (["apple", "cherry", "banana"], [1.0, 0.75, 0.5]),
+        ],
+    )
+    def test_lazy(self, fruits, expected):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds
+        )
+        outer_encoder.fit(train_df, train_y)
+
+        encoded_lazy = outer_encoder.transform(pl.LazyFrame({"fruits": fruits}))
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(encoded_lazy.collect(), pl.DataFrame({"fruits": expected}))
+
+    @pytest.mark.parametrize(
+        "inner_encoder",
+        [
+            _GreedyTargetEncoder(),
+            _GreedyTargetEncoder(smoothing_method="m-estimate"),
+            _GreedyTargetEncoder(smoothing_method="eb", smoothing_params={"k": 2}),
+            CountEncoder(),
+        ],
+    )
+    def test_fit_method_subtract(self, inner_encoder):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", None, "apple", "cherry", "banana"],
+                "users": ["alice", "bob", "alice", "alice", "bob", "bob"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0, 1],
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        refit_encoder = OutOfFoldEncodeWrapper(inner=inner_encoder, folds=folds)
+        refit_encoder.fit(train_df, train_y)
+        subtract_encoder = OutOfFoldEncodeWrapper(
+            inner=inner_encoder, folds=folds, fit_method="subtract"
+        )
+        subtract_encoder.fit(train_df, train_y)
+
+        assert_frame_equal(
+            subtract_encoder.transform(train_df),
+            refit_encoder.transform(train_df),
+        )
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "unseen", None],
+                "users": ["bob", "alice", "carol"],
+            }
+        )
+        assert_frame_equal(
+            subtract_encoder.transform(test_df),
+            refit_encoder.transform(test_df),
+        )
+
+    @pytest.mark.parametrize(
+        "folds",
+        [
+            [([0, 1], [2]), ([2, 3], [0, 1])],
+            # evaluation rows partition the data, but training rows are not the rest
+            [([0, 2], [2, 3]), ([1, 3], [0, 1])],
+        ],
+    )
+    def test_fit_method_subtract_not_partitioned(self, folds):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        outer_encoder = OutOfFoldEncodeWrapper(
+            inner=_GreedyTargetEncoder(), folds=folds, fit_method="subtract"
+        )
+        with pytest.raises(ValueError):
+            outer_encoder.fit(train_df, train_y)
+
 
 if __name__ == "__main__":
     import sys
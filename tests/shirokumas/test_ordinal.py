@@ -137,6 +137,21 @@ class TestOrdinalEncoder:
         with pytest.raises(ValueError):
             encoder.fit(train_df)
 
+    def test_handle_missing_error_fit_mappings(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", None],
+            }
+        )
+        mappings = {
+            "fruits": {
+                "apple": 10,
+            }
+        }
+        encoder = OrdinalEncoder(mappings=mappings, handle_missing="error")
+        with pytest.raises(ValueError):
+            encoder.fit(train_df)
+
     def test_handle_missing_error_transform(self):
         train_df = pl.DataFrame(
             {
@@ -215,6 +230,33 @@ class TestOrdinalEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", "bob", "carol"],
+            }
+        )
+        encoder = OrdinalEncoder()
+        encoder.fit(train_df.lazy())
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+                "users": ["alice", "unseen", None],
+            },
+        )
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [-1, -2, 2],
+                "users": [1, -1, -2],
+            },
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,146 @@
+import os
+import tempfile
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from sklearn.model_selection import KFold
+
+from shirokumas import CountEncoder
+from shirokumas import OneHotEncoder
+from shirokumas import TargetEncoder
+from shirokumas import sink_transform
+
+
+class TestSinkTransform:
+    def test_parquet(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+            }
+        )
+        with tempfile.TemporaryDirectory() as dirname:
+            source = os.path.join(dirname, "source.parquet")
+            test_df.write_parquet(source)
+            destination = os.path.join(dirname, "destination.parquet")
+            sink_transform(encoder, source, destination)
+            encoded_df = pl.read_parquet(destination)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [-1, -2, 2],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_ipc(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        encoder = CountEncoder()
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            destination = os.path.join(dirname, "destination.arrow")
+            sink_transform(encoder, train_df.lazy(), destination, file_format="ipc")
+            encoded_df = pl.read_ipc(destination)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1, 2, 2],
+            },
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_handle_unknown_error(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        encoder = CountEncoder(handle_unknown="error")
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry"],
+            }
+        )
+        with tempfile.TemporaryDirectory() as dirname:
+            destination = os.path.join(dirname, "destination.parquet")
+            with pytest.raises(ValueError):
+                sink_transform(encoder, test_df.lazy(), destination)
+
+    def test_unsupported_source(self):
+        encoder = CountEncoder()
+        with pytest.raises(ValueError):
+            sink_transform(encoder, "source.txt", "destination.parquet")
+
+    def test_unsupported_file_format(self):
+        # rejected before the transform, which would raise NotFittedException
+        encoder = CountEncoder()
+        with pytest.raises(ValueError):
+            sink_transform(
+                encoder, pl.LazyFrame(), "destination.csv", file_format="csv"
+            )
+
+    def test_sparse_output(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+            }
+        )
+        encoder = OneHotEncoder(sparse_output=True)
+        encoder.fit(train_df)
+
+        with tempfile.TemporaryDirectory() as dirname:
+            destination = os.path.join(dirname, "destination.parquet")
+            with pytest.raises(ValueError):
+                sink_transform(encoder, train_df.lazy(), destination)
+            assert not os.path.exists(destination)
+
+    def test_target_encoder(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        encoder = TargetEncoder(folds=KFold(n_splits=4, shuffle=False))
+        encoder.fit(train_df, train_y)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry", "banana", "apple"],
+            }
+        )
+        with tempfile.TemporaryDirectory() as dirname:
+            destination = os.path.join(dirname, "destination.parquet")
+            sink_transform(encoder, test_df.lazy(), destination)
+            encoded_df = pl.read_parquet(destination)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1.0, 0.75, 0.5, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-svv"]))
@@ -1,6 +1,7 @@
 import pickle
 import tempfile
 
+import numpy as np
 import polars as pl
 import pytest
 from polars.testing import assert_frame_equal
@@ -177,6 +178,30 @@ class TestGreedyTargetEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_smoothing_eb_overflow(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple", "cherry", "cherry"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[0, 1, 1, 1, 0, 0],
+        )
+        encoder = _GreedyTargetEncoder(
+            smoothing_method="eb",
+            smoothing_params={"k": 10_000, "f": 1},
+        )
+        encoder.fit(train_df, train_y)
+        encoded_df = encoder.transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [0.5] * 6,
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
     def test_smoothing_eb_default_params(self):
         train_df = pl.DataFrame(
             {
@@ -207,6 +232,108 @@ class TestGreedyTargetEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    @pytest.mark.parametrize(
+        "smoothing_method, smoothing_params",
+        [
+            ("none", None),
+            ("m-estimate", {"m": 2.0}),
+            ("eb", {"k": 2, "f": 1}),
+        ],
+    )
+    def test_sample_weight(self, smoothing_method, smoothing_params):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "apple", "banana", "banana", "cherry"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[0, 1, 0, 1, 1],
+        )
+        sample_weight = [3, 1, 1, 2, 2]
+        encoder = _GreedyTargetEncoder(smoothing_method, smoothing_params)
+        encoder.fit(train_df, train_y, sample_weight=sample_weight)
+
+        # the same as repeating each row by its weight
+        repeats = pl.Series(sample_weight)
+        upsampled_encoder = _GreedyTargetEncoder(smoothing_method, smoothing_params)
+        upsampled_encoder.fit(
+            train_df.select(pl.all().repeat_by(repeats).explode()),
+            train_y.repeat_by(repeats).explode(),
+        )
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "cherry", "unseen"],
+            }
+        )
+        assert_frame_equal(
+            encoder.transform(test_df),
+            upsampled_encoder.transform(test_df),
+        )
+
+    @pytest.mark.parametrize("smoothing_method", ["none", "m-estimate", "eb"])
+    def test_missing_targets(self, smoothing_method):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "apple", "banana", "banana"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, None, None],
+        )
+        encoder = _GreedyTargetEncoder(smoothing_method)
+        encoder.fit(train_df, train_y)
+        encoded_df = encoder.transform(train_df)
+
+        # a category without any target is encoded into the global mean, not NaN
+        global_mean = train_y.mean()
+        assert encoded_df.get_column("fruits").is_nan().not_().all()
+        assert encoded_df.get_column("fruits").tail(2).to_list() == [
+            global_mean,
+            global_mean,
+        ]
+
+    def test_classes(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "apple", "banana", "banana", "cherry", "cherry"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=["x", "y", "x", "x", "z", "y"],
+        )
+        encoder = _GreedyTargetEncoder(classes=["x", "y", "z"])
+        encoder.fit(train_df, train_y)
+        encoded_df = encoder.transform(train_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_x": [0.5, 0.5, 1.0, 1.0, 0.0, 0.0],
+                "fruits_y": [0.5, 0.5, 0.0, 0.0, 0.5, 0.5],
+                "fruits_z": [0.0, 0.0, 0.0, 0.0, 0.5, 0.5],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits_x": [0.5, 0.5],
+                "fruits_y": [2 / 6, 2 / 6],
+                "fruits_z": [1 / 6, 1 / 6],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
     def test_cols(self):
         train_df = pl.DataFrame(
             {
@@ -304,7 +431,8 @@ class TestGreedyTargetEncoder:
 
 
 class TestTargetEncoder:
-    def test(self):
+    @pytest.mark.parametrize("fit_method", ["refit", "subtract"])
+    def test(self, fit_method):
         train_df = pl.DataFrame(
             {
                 "fruits": ["apple", "banana", "banana", "apple"],
@@ -315,7 +443,7 @@ class TestTargetEncoder:
             values=[1, 0, 1, 1],
         )
         folds = KFold(n_splits=4, shuffle=False)
-        outer_encoder = TargetEncoder(folds=folds)
+        outer_encoder = TargetEncoder(folds=folds, fit_method=fit_method)
         outer_encoder.fit(train_df, train_y)
         encoded_df = outer_encoder.transform(train_df)
 
@@ -360,6 +488,227 @@ class TestTargetEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_set_smoothing_params(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple", "cherry", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1, 0, 0],
+        )
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "unseen", None, "cherry"],
+            }
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        encoder = TargetEncoder(folds=folds)
+        encoder.fit(train_df, train_y)
+
+        for smoothing_method, smoothing_params in [
+            ("m-estimate", {"m": 2.0}),
+            ("eb", {"k": 1, "f": 2}),
+            ("none", None),
+        ]:
+            encoder.set_params(
+                smoothing_method=smoothing_method,
+                smoothing_params=smoothing_params,
+            )
+            refitted_encoder = TargetEncoder(
+                folds=folds,
+                smoothing_method=smoothing_method,
+                smoothing_params=smoothing_params,
+            )
+            refitted_encoder.fit(train_df, train_y)
+
+            assert_frame_equal(
+                encoder.transform(train_df),
+                refitted_encoder.transform(train_df),
+            )
+            assert_frame_equal(
+                encoder.transform(test_df),
+                refitted_encoder.transform(test_df),
+            )
+
+        encoder.set_params(cols=["fruits"])
+        with pytest.raises(NotFittedException):
+            encoder.transform(test_df)
+
+    @pytest.mark.parametrize("fit_method", ["refit", "subtract"])
+    def test_multiclass(self, fit_method):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple", "cherry", "apple"],
+                "users": ["alice", "bob", "alice", "alice", "bob", "bob"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[0, 2, 1, 1, 0, 2],
+        )
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "unseen", None, "cherry"],
+                "users": ["bob", "alice", "carol", "alice"],
+            }
+        )
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        encoder = TargetEncoder(
+            folds=folds,
+            smoothing_method="m-estimate",
+            fit_method=fit_method,
+            multiclass=True,
+        )
+        encoder.fit(train_df, train_y)
+
+        # the same as encoding one class versus the rest at a time
+        for value in [0, 1, 2]:
+            binary_encoder = TargetEncoder(
+                folds=folds,
+                smoothing_method="m-estimate",
+            )
+            binary_encoder.fit(train_df, (train_y == value).cast(pl.Int64))
+
+            for df in [train_df, test_df]:
+                expected_df = binary_encoder.transform(df)
+                assert_frame_equal(
+                    encoder.transform(df).select(f"fruits_{value}", f"users_{value}"),
+                    expected_df.rename(lambda col: f"{col}_{value}"),
+                )
+
+    def test_ordered(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "apple", "apple", None, "banana"],
+                "time": [5, 1, 3, 4, 2, 0],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 0, 1, 1],
+        )
+        encoder = TargetEncoder(folds="ordered", order_by="time", cols=["fruits"])
+        encoded_df = encoder.fit_transform(train_df, train_y)
+
+        # rows without preceding rows of the same category get the global mean
+        global_mean = train_y.mean()
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [0.5, 1.0, global_mean, 1.0, global_mean, global_mean],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        # transform() uses the statistics of all the training rows, even for them
+        encoded_df = encoder.transform(train_df)
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [2 / 3, 0.5, 2 / 3, 2 / 3, global_mean, 0.5],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "unseen", "banana"],
+                "time": [6, 7, 8],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [2 / 3, global_mean, 0.5],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        encoder.set_params(smoothing_method="m-estimate", smoothing_params={"m": 1.0})
+        encoded_df = encoder.fit_transform(train_df, train_y)
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [
+                    (1 + global_mean) / 3,
+                    (1 + global_mean) / 2,
+                    global_mean,
+                    (1 + global_mean) / 2,
+                    global_mean,
+                    global_mean,
+                ],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_ordered_order_by_not_encoded(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "apple", "apple"],
+                "time": [3, 2, 1, 0],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 0],
+        )
+        encoder = TargetEncoder(folds="ordered", order_by="time")
+        assert encoder.fit_transform(train_df, train_y).columns == ["fruits"]
+        assert encoder.transform(train_df).columns == ["fruits"]
+
+        encoder = TargetEncoder(
+            folds="ordered", order_by="time", cols=["fruits", "time"]
+        )
+        with pytest.raises(ValueError):
+            encoder.fit(train_df, train_y)
+
+    def test_sample_weight(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "apple", "apple", "cherry", "banana"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 0, 1, 1],
+        )
+        sample_weight = np.array([1.0, 2.0, 0.5, 1.0, 3.0, 1.0])
+        folds = KFold(n_splits=3, shuffle=True, random_state=42)
+        encoded_dfs = [
+            TargetEncoder(
+                folds=folds, smoothing_method="eb", fit_method=fit_method
+            ).fit_transform(train_df, train_y, sample_weight=sample_weight)
+            for fit_method in ["refit", "subtract"]
+        ]
+        assert_frame_equal(encoded_dfs[0], encoded_dfs[1])
+
+        encoder = TargetEncoder(folds="ordered", cols=["fruits"], random_state=0)
+        encoder.fit(train_df, train_y, sample_weight=sample_weight)
+        encoded_df = encoder.transform(pl.DataFrame({"fruits": ["apple"]}))
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [(1.0 + 0.5) / (1.0 + 0.5 + 1.0)],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+    def test_ordered_random_state(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "apple", "apple", "cherry", "banana"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 0, 1, 1],
+        )
+        encoded_dfs = [
+            TargetEncoder(folds="ordered", random_state=42).fit_transform(
+                train_df, train_y
+            )
+            for _ in range(2)
+        ]
+        assert_frame_equal(encoded_dfs[0], encoded_dfs[1])
+
     def test_not_fitted(self):
         train_df = pl.DataFrame(
             {
@@ -371,6 +720,27 @@ class TestTargetEncoder:
         with pytest.raises(NotFittedException):
             encoder.transform(train_df)
 
+    @pytest.mark.parametrize(
+        "folds, fit_method",
+        [
+            (KFold(n_splits=4, shuffle=False), "refit"),
+            (KFold(n_splits=4, shuffle=False), "subtract"),
+            ("ordered", "refit"),
+        ],
+    )
+    @pytest.mark.parametrize("multiclass", [False, True])
+    def test_without_y(self, folds, fit_method, multiclass):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        encoder = TargetEncoder(
+            folds=folds, fit_method=fit_method, multiclass=multiclass
+        )
+        with pytest.raises(ValueError):
+            encoder.fit_transform(train_df)
+
     def test_pickle(self):
         train_df = pl.DataFrame(
             {
@@ -405,6 +775,83 @@ class TestTargetEncoder:
         )
         assert_frame_equal(encoded_df, expected_df)
 
+    def test_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        outer_encoder = TargetEncoder(folds=folds)
+        outer_encoder.fit(train_df.lazy(), train_y)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry", "banana", "apple"],
+            }
+        )
+        encoded_lazy = outer_encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+
+        expected_df = pl.DataFrame(
+            {
+                "fruits": [1.0, 0.75, 0.5, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
+        encoded_lazy = outer_encoder.fit_transform(train_df.lazy(), train_y)
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(
+            encoded_lazy.collect(), outer_encoder.fit_transform(train_df, train_y)
+        )
+
+    def test_ordered_lazy(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry", "banana", "apple"],
+            }
+        )
+        encoder = TargetEncoder(folds="ordered", random_state=0)
+
+        encoded_lazy = encoder.fit_transform(train_df.lazy(), train_y)
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(
+            encoded_lazy.collect(), encoder.fit_transform(train_df, train_y)
+        )
+
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(encoded_lazy.collect(), encoder.transform(test_df))
+
+    def test_ordered_fitted_size(self):
+        # the statistics of the preceding rows are not kept by the fitted encoder
+        pickled_sizes = []
+        for n_rows in [10, 10000]:
+            train_df = pl.DataFrame(
+                {
+                    "fruits": ["apple", "banana"] * (n_rows // 2),
+                }
+            )
+            train_y = pl.Series(name="target", values=[1, 0] * (n_rows // 2))
+            encoder = TargetEncoder(folds="ordered", random_state=0)
+            encoder.fit_transform(train_df, train_y)
+            pickled_sizes.append(len(pickle.dumps(encoder)))
+        assert pickled_sizes[0] == pickled_sizes[1]
+
 
 if __name__ == "__main__":
     import sys
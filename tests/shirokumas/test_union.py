@@ -0,0 +1,166 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+from sklearn.model_selection import KFold
+
+from shirokumas import CountEncoder
+from shirokumas import EncoderUnion
+from shirokumas import NullEncoder
+from shirokumas import OrdinalEncoder
+from shirokumas import TargetEncoder
+from shirokumas._exceptions import NotFittedException
+
+
+class TestEncoderUnion:
+    def test(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana"],
+                "users": ["alice", None, "carol"],
+            }
+        )
+        encoder = EncoderUnion(
+            encoders=[
+                ("count", CountEncoder(cols=["fruits"])),
+                ("ordinal", OrdinalEncoder(cols=["fruits"])),
+                ("null", NullEncoder(cols=["users"])),
+            ]
+        )
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["unseen", None, "banana"],
+                "users": ["alice", "bob", None],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "count__fruits": [-1, -2, 2],
+                "ordinal__fruits": [-1, -2, 2],
+                "null__users": [False, False, True],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        encoded_lazy = encoder.transform(test_df.lazy())
+        assert isinstance(encoded_lazy, pl.LazyFrame)
+        assert_frame_equal(encoded_lazy.collect(), expected_df)
+
+    def test_not_base_encoder(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana", "banana", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 1],
+        )
+        folds = KFold(n_splits=4, shuffle=False)
+        encoder = EncoderUnion(
+            encoders=[
+                ("count", CountEncoder()),
+                ("target", TargetEncoder(folds=folds)),
+            ]
+        )
+        encoder.fit(train_df, train_y)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry", "banana", "apple"],
+            }
+        )
+        encoded_df = encoder.transform(test_df)
+
+        expected_df = pl.DataFrame(
+            {
+                "count__fruits": [2, -1, 2, 2],
+                "target__fruits": [1.0, 0.75, 0.5, 1.0],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        encoder = EncoderUnion(
+            encoders=[
+                ("target", TargetEncoder(folds=folds)),
+                ("count", CountEncoder()),
+            ]
+        )
+        encoder.fit(train_df, train_y)
+        encoded_df = encoder.transform(test_df)
+
+        assert_frame_equal(
+            encoded_df, expected_df.select("target__fruits", "count__fruits")
+        )
+
+    def test_fit_transform_out_of_fold(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "apple", "banana", "banana", "apple", "apple"],
+            }
+        )
+        train_y = pl.Series(
+            name="target",
+            values=[1, 0, 1, 0, 1, 0],
+        )
+        folds = KFold(n_splits=3, shuffle=False)
+        encoder = EncoderUnion(
+            encoders=[
+                ("target", TargetEncoder(folds=folds)),
+                ("count", CountEncoder()),
+            ]
+        )
+        encoded_df = encoder.fit_transform(train_df, train_y)
+
+        target_df = TargetEncoder(folds=folds).fit_transform(train_df, train_y)
+        expected_df = pl.DataFrame(
+            {
+                "target__fruits": target_df.get_column("fruits"),
+                "count__fruits": [4, 4, 2, 2, 4, 4],
+            }
+        )
+        assert_frame_equal(encoded_df, expected_df)
+
+        # the training data is recognized by transform() as well
+        assert_frame_equal(encoder.transform(train_df), expected_df)
+
+    def test_handle_unknown_error(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        encoder = EncoderUnion(
+            encoders=[
+                ("count", CountEncoder(handle_unknown="error")),
+                ("null", NullEncoder()),
+            ]
+        )
+        encoder.fit(train_df)
+
+        test_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "cherry"],
+            }
+        )
+        with pytest.raises(ValueError):
+            encoder.transform(test_df)
+
+    def test_not_fitted(self):
+        train_df = pl.DataFrame(
+            {
+                "fruits": ["apple", "banana"],
+            }
+        )
+        encoder = EncoderUnion(encoders=[("count", CountEncoder())])
+        with pytest.raises(NotFittedException):
+            encoder.transform(train_df)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-svv"]))